@@ -1,17 +1,34 @@
 import csv
+import functools
+import gzip
+import io
+import json
+import multiprocessing
+from multiprocessing.util import Finalize
+import shutil
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 import os
 import sys
 import boto3
+from boto3.s3.transfer import TransferConfig
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import re
 from datetime import datetime, timezone
+from urllib.parse import urljoin
+import lxml.html
+import pyarrow as pa
+import pyarrow.parquet as pq
+from lxml.cssselect import CSSSelector
 from dotenv import load_dotenv
 
 # Safe print function to handle Unicode characters
@@ -51,105 +68,414 @@ CITIES_TO_SEARCH = [
     "Trivandrum", "Thrissur", "Udaipur", "Vadodara", "Valsad", "Vapi",
     "Varanasi", "Vijayawada", "Visakhapatnam"
 ]
+# Drop repeats (keeping order) so an edit to the list can't scrape a city twice
+CITIES_TO_SEARCH = list(dict.fromkeys(CITIES_TO_SEARCH))
 
 
+# Outer wrapper shared by every property card type (project, premium, regular)
+CARD_SELECTOR = "div[class*='outerTupleWrap']"
+
+# Returns the outerHTML of every card on the page in a single WebDriver round trip
+CARDS_HTML_JS = "return Array.from(document.querySelectorAll(arguments[0]), e => e.outerHTML);"
+
+# Scrolls to the bottom and returns the card count in one round trip; the page is
+# considered fully loaded once the count is unchanged for two consecutive checks
+SCROLL_AND_COUNT_JS = "window.scrollTo(0, document.body.scrollHeight); return document.querySelectorAll(arguments[0]).length;"
+SCROLL_POLL_SECONDS = 0.3
+SCROLL_MAX_CHECKS = 20
+
+# Text and href of every pagination link, read in a single script call
+PAGINATION_LINKS_JS = """
+return Array.from(document.querySelectorAll('.Pagination__srpPagination a'),
+                  a => ({text: a.innerText.trim(), href: a.href}));
+"""
+
+# Popup close buttons tried in order by close_popup_if_exists()
+POPUP_SELECTORS = [
+    '[data-label="RERA_DISCLAIMER.OK_GOT_IT"]',
+    '.modal-close',
+    '.close-button',
+    '[aria-label="Close"]',
+    'button[class*="close"]',
+    '.overlay-close',
+    '#close-popup',
+]
+
+# Search box and search button locators tried in order by search_city_via_form()
+SEARCH_INPUT_SELECTORS = [
+    (By.ID, "keyword2"),
+    (By.CSS_SELECTOR, "input[id='keyword2']"),
+    (By.CSS_SELECTOR, "#keyword2"),
+    (By.CSS_SELECTOR, "input[placeholder*='Search']"),
+    (By.CSS_SELECTOR, "input[placeholder*='search']"),
+    (By.CSS_SELECTOR, "input[type='text'][name*='keyword']"),
+    (By.CSS_SELECTOR, "#searchform input[type='text']"),
+    (By.CSS_SELECTOR, "form#searchform input"),
+    (By.CSS_SELECTOR, ".search-input"),
+    (By.CSS_SELECTOR, "input.autocomplete-input"),
+]
+SEARCH_BUTTON_SELECTORS = [
+    (By.ID, "searchform_search_btn"),
+    (By.CSS_SELECTOR, "button[type='submit']"),
+    (By.CSS_SELECTOR, "#searchform button"),
+    (By.CSS_SELECTOR, "input[type='submit']"),
+]
+
+# Separator between property type and location in card headings ("2 BHK Flat in Andheri")
+HEADING_SPLIT_RE = re.compile(r"\s+in\s+", re.IGNORECASE)
+
 # Maximum number of pages to scrape per city (set to None for unlimited)
 MAX_PAGES_PER_CITY = None  # Set to a number like 8 to limit, or None for all pages
 
-# Initialize Chrome driver with anti-detection settings
+# Results-page URL learned for each city from a previous search-form run; cities
+# in here are opened directly instead of going through the homepage search box
+CITY_URLS_FILE = "output/99acres_city_urls.json"
+
+# The writer thread appends CSV rows in batches of this many rows through a 1MB
+# buffer; the OS flushes it, and the file is complete once the writer stops
+CSV_BATCH_ROWS = 1000
+CSV_BUFFER_BYTES = 1 << 20
+
+# One property_url per line for every row in the CSV, appended by the writer thread,
+# so workers can load the dedupe set without parsing the whole CSV
+SEEN_URLS_FILE = "output/99acres_properties.urls.txt"
+
+# Constant value for the 'source' column, added when rows are written to CSV
+SOURCE = "99acres"
+
+# CSV columns - full structure with all extracted data
+CSV_FIELDNAMES = [
+    'project_name',
+    'property_heading',
+    'property_type',
+    'city',
+    'location',
+    'price',
+    'price_per_sqft',
+    'area',
+    'bhk_config',
+    'possession_status',
+    'rera_status',
+    'property_tag',
+    'highlights',
+    'description',
+    'property_url',
+    'card_type',
+    'scraped_at',
+    'source'
+]
+
+# Every row of a run is also written to a zstd-compressed Parquet file for
+# analytics, flushed in batches of this many rows (all columns as strings)
+PARQUET_BATCH_ROWS = 10000
+PARQUET_SCHEMA = pa.schema([(name, pa.string()) for name in CSV_FIELDNAMES])
+
+
+@functools.lru_cache(maxsize=1)
+def _format_scraped_at(epoch_second):
+    return datetime.fromtimestamp(epoch_second).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _now_cached():
+    """Current local time as 'YYYY-mm-dd HH:MM:SS', formatted at most once per second"""
+    return _format_scraped_at(int(time.time()))
+
+# S3 settings are read once at import; the client is created on first upload
+load_dotenv()
+S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+# Multipart settings for output uploads (single PUT below the threshold); raise
+# S3_CONCURRENCY on hosts with more network bandwidth, lower it on small ones
+S3_CONCURRENCY = int(os.getenv("S3_CONCURRENCY", "10"))
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=16 * 1024 ** 2,
+    multipart_chunksize=16 * 1024 ** 2,
+    max_concurrency=S3_CONCURRENCY,
+    max_io_queue=100,
+    use_threads=True,
+)
+
+# Number of Chrome worker processes scraping cities in parallel
+CITY_WORKERS = int(os.getenv("ACRES99_WORKERS", "4"))
+# Gap between worker start-ups so the browsers don't all launch and hit the site at once
+WORKER_STAGGER_SECONDS = 0.1
+# Each worker slot reuses its own Chrome profile across runs, so the site's JS/CSS
+# bundles come from the disk cache instead of being downloaded again
+PROFILE_ROOT = os.getenv("ACRES99_PROFILE_ROOT", "/tmp/acres99-chrome")
+
+# Sent by both the browser and the plain-HTTP page fetches
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Chrome driver options with anti-detection settings
 chrome_options = Options()
-chrome_options.add_argument('--headless')  # Uncomment to run in headless mode
+chrome_options.add_argument('--headless=new')  # Uncomment to run in headless mode
 chrome_options.add_argument('--no-sandbox')
+chrome_options.add_argument('--no-zygote')  # Only valid together with --no-sandbox
 chrome_options.add_argument('--disable-dev-shm-usage')
+# Strip background work Chrome does for interactive users; every pool worker runs its own browser
+for flag in (
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-breakpad',
+    '--disable-client-side-phishing-detection',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-extensions',
+    '--disable-sync',
+    '--disable-hang-monitor',
+    '--disable-ipc-flooding-protection',
+    '--metrics-recording-only',
+    '--no-first-run',
+    '--no-pings',
+    '--mute-audio',
+):
+    chrome_options.add_argument(flag)
 chrome_options.add_argument('--disable-blink-features=AutomationControlled')
 chrome_options.add_argument('--window-size=1920,1080')
-chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+chrome_options.add_argument(f'user-agent={USER_AGENT}')
 chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
 chrome_options.add_experimental_option('useAutomationExtension', False)
+chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+chrome_options.add_argument('--disk-cache-size=209715200')  # 200MB
+
+# Dismiss the RERA disclaimer from inside the page as soon as it is rendered,
+# so navigations don't need a WebDriver round-trip to poll for it
+POPUP_OBSERVER_JS = """
+new MutationObserver((mutations, observer) => {
+    const btn = document.querySelector('[data-label="RERA_DISCLAIMER.OK_GOT_IT"]');
+    if (btn) {
+        btn.click();
+        observer.disconnect();
+    }
+}).observe(document, {childList: true, subtree: true});
+"""
+
+# Requests the scraper never needs (it only reads card text): images, fonts, media
+# and analytics. Stylesheets are kept because visibility/clickability checks need layout.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.mp4*", "*.webm*",
+    "*/gtm.js*", "*googletagmanager*", "*google-analytics*", "*doubleclick*",
+]
 
-driver = webdriver.Chrome(options=chrome_options)
+# Per-process state: each pool worker gets its own driver in _init_worker();
+# the CSV lock, the CSV queue and the stop event are shared by all workers and the parent
+driver = None
+_csv_lock = None
+_csv_queue = None
+# Set by the parent on Ctrl+C / SIGTERM; workers finish the page in hand and return
+_stop_event = None
+_city_urls = {}
+# Set once a popup has been closed in this worker's browser; the site remembers
+# the dismissal in a cookie, which every later tab of the same browser shares
+_popup_dismissed = False
+# property_url of every row already in the CSV or scraped by this worker
+_seen_urls = set()
+# requests session for fetching later result pages without the browser; switched
+# off for the rest of the run if a fetched page turns out to have no cards
+_http = None
+_http_pages_ok = True
+# Reusable waits for this worker's driver, polling faster than the 0.5s default
+_wait_short = None
+_wait = None
+_wait_long = None
 
-# Hide webdriver property to avoid detection
-driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+def get_driver(profile_dir=None):
+    """Create a Chrome driver with the anti-detection settings and popup observer"""
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f'--user-data-dir={profile_dir}')
+    # Reuse one HTTP connection to chromedriver for every command (explicit, not left to defaults)
+    new_driver = webdriver.Chrome(options=chrome_options, keep_alive=True)
+    
+    # Hide webdriver property to avoid detection
+    new_driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    prepare_tab(new_driver)
+    return new_driver
+
+
+def prepare_tab(tab_driver):
+    """Apply per-tab CDP settings: the popup observer and network request blocking"""
+    tab_driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": POPUP_OBSERVER_JS})
+    tab_driver.execute_cdp_cmd("Network.enable", {})
+    tab_driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+def load_city_urls():
+    """Read the learned city -> results URL map, or {} if there is none yet"""
+    try:
+        with open(CITY_URLS_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_city_urls(city_urls):
+    """Persist the learned city -> results URL map for the next run"""
+    os.makedirs(os.path.dirname(CITY_URLS_FILE), exist_ok=True)
+    with open(CITY_URLS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(city_urls, f, indent=2, sort_keys=True)
+
+
+def ensure_seen_urls_index(csv_path="output/99acres_properties.csv"):
+    """Build the property_url sidecar from an existing CSV that predates it (parent, once)"""
+    if os.path.exists(SEEN_URLS_FILE) or not os.path.exists(csv_path):
+        return
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        urls = [row['property_url'] for row in csv.DictReader(f) if row.get('property_url')]
+    with open(SEEN_URLS_FILE, 'w', encoding='utf-8') as f:
+        f.writelines(url + "\n" for url in urls)
+
+
+def load_seen_urls():
+    """Read the property_url sidecar (one URL per line) as a set"""
+    try:
+        with open(SEEN_URLS_FILE, encoding='utf-8') as f:
+            return set(f.read().splitlines())
+    except FileNotFoundError:
+        return set()
+
+
+def _init_worker(csv_lock, csv_queue, stop_event, start_counter):
+    """Pool initializer: give this worker process its own browser"""
+    global driver, _csv_lock, _csv_queue, _stop_event, _city_urls, _seen_urls, _http, _wait_short, _wait, _wait_long
+    _csv_lock = csv_lock
+    _csv_queue = csv_queue
+    _stop_event = stop_event
+    _city_urls = load_city_urls()
+    with _csv_lock:
+        _seen_urls = load_seen_urls()
+    
+    # Ctrl+C and the API's /stop (SIGTERM to the whole process group) are handled by
+    # the parent, which sets _stop_event. A worker killed by a signal could die in the
+    # middle of a _csv_queue.put() and leave the queue corrupt or blocked
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    
+    with start_counter.get_lock():
+        slot = start_counter.value
+        start_counter.value += 1
+    time.sleep(slot * WORKER_STAGGER_SECONDS)
+    
+    driver = get_driver(os.path.join(PROFILE_ROOT, f"worker-{slot}"))
+    _wait_short = WebDriverWait(driver, 5, poll_frequency=0.1)
+    _wait = WebDriverWait(driver, 10, poll_frequency=0.1)
+    _wait_long = WebDriverWait(driver, 20, poll_frequency=0.25)
+    _http = requests.Session()
+    _http.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+    # Pool workers exit without running atexit handlers, so register with multiprocessing
+    Finalize(None, driver.quit, exitpriority=10)
+
+
+def open_fresh_tab():
+    """Give the next city a clean tab in the already-running browser.
+
+    Opens a new tab (WebDriver New Window -> Target.createTarget in chromedriver),
+    closes the previous tab(s) and re-applies prepare_tab(), since CDP settings
+    are per tab. A crashed or hung tab only costs that tab, not a relaunch.
+    """
+    old_handles = driver.window_handles
+    driver.switch_to.new_window('tab')
+    new_handle = driver.current_window_handle
+    for handle in old_handles:
+        try:
+            driver.switch_to.window(handle)
+            driver.close()
+        except WebDriverException:
+            pass  # Tab already gone or unresponsive
+    driver.switch_to.window(new_handle)
+    prepare_tab(driver)
 
 
 def close_popup_if_exists():
-    """Close any popup/overlay that might appear"""
+    """Close any popup/overlay that might appear (only until the first one is closed)"""
+    global _popup_dismissed
+    if _popup_dismissed:
+        return
+    
     popup_closed = False
     
     # Try multiple popup close methods
-    popup_selectors = [
-        '[data-label="RERA_DISCLAIMER.OK_GOT_IT"]',
-        '.modal-close',
-        '.close-button',
-        '[aria-label="Close"]',
-        'button[class*="close"]',
-        '.overlay-close',
-        '#close-popup',
-    ]
-    
-    for selector in popup_selectors:
+    # (find_elements returns [] on a miss instead of raising NoSuchElementException)
+    for selector in POPUP_SELECTORS:
+        popups = driver.find_elements(By.CSS_SELECTOR, selector)
+        if not popups:
+            continue
         try:
-            popup = driver.find_element(By.CSS_SELECTOR, selector)
-            if popup.is_displayed():
-                driver.execute_script("arguments[0].click();", popup)
+            if popups[0].is_displayed():
+                driver.execute_script("arguments[0].click();", popups[0])
                 print("  [OK] Closed popup")
                 popup_closed = True
-                time.sleep(0.5)
+                _popup_dismissed = True
                 break
-        except:
-            continue
+        except WebDriverException:
+            continue  # Popup went stale or became unclickable
     
     # Try pressing Escape key to close any modal
     if not popup_closed:
         try:
             body = driver.find_element(By.TAG_NAME, "body")
             body.send_keys(Keys.ESCAPE)
-            time.sleep(0.5)
-        except:
+        except WebDriverException:
             pass
 
 
 def search_city(city_name):
-    """Search for properties in a specific city"""
+    """Open the results page for a city, directly if its URL is known, else via the search form"""
+    print(f"\n{'='*60}")
+    print(f"Searching for properties in: {city_name}")
+    print(f"{'='*60}")
+    
+    # Skip the homepage and search form when a previous run already learned the URL
+    cached_url = _city_urls.get(city_name)
+    if cached_url:
+        print(f"  Opening known results URL: {cached_url}")
+        try:
+            driver.get(cached_url)
+            _wait_long.until(EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR)))
+            return True
+        except (TimeoutException, WebDriverException):
+            print(f"  [INFO] Known URL showed no property cards, falling back to the search form")
+            _city_urls.pop(city_name, None)
+    
+    if not search_city_via_form(city_name):
+        return False
+    
+    # Remember where the search landed so the next run can go straight there
+    if driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR):
+        _city_urls[city_name] = driver.current_url
+    return True
+
+
+def search_city_via_form(city_name):
+    """Search for properties in a specific city using the homepage search box"""
     try:
-        print(f"\n{'='*60}")
-        print(f"Searching for properties in: {city_name}")
-        print(f"{'='*60}")
-        
         # Go to homepage - always start fresh for each city
         driver.get("https://www.99acres.com/")
         
-        # Wait for page to load
-        time.sleep(3)
+        # Wait for the search box to render (fallback selectors below handle layout changes)
+        try:
+            _wait_long.until(EC.presence_of_element_located((By.ID, "keyword2")))
+        except TimeoutException:
+            pass
         
-        # Close any popups/overlays multiple times to ensure they're gone
-        for _ in range(3):
-            close_popup_if_exists()
-            time.sleep(1)
+        # Close any popups/overlays (the RERA disclaimer is also dismissed in-page)
+        close_popup_if_exists()
         
         # Wait for search input to be available and interactable - try multiple selectors
         search_input = None
-        wait = WebDriverWait(driver, 20)
         
         # Try different selectors for the search input - first try presence, then clickable
-        selectors = [
-            (By.ID, "keyword2"),
-            (By.CSS_SELECTOR, "input[id='keyword2']"),
-            (By.CSS_SELECTOR, "#keyword2"),
-            (By.CSS_SELECTOR, "input[placeholder*='Search']"),
-            (By.CSS_SELECTOR, "input[placeholder*='search']"),
-            (By.CSS_SELECTOR, "input[type='text'][name*='keyword']"),
-            (By.CSS_SELECTOR, "#searchform input[type='text']"),
-            (By.CSS_SELECTOR, "form#searchform input"),
-            (By.CSS_SELECTOR, ".search-input"),
-            (By.CSS_SELECTOR, "input.autocomplete-input"),
-        ]
-        
         # First, try to find element by presence (faster)
-        for selector_type, selector_value in selectors:
+        for selector_type, selector_value in SEARCH_INPUT_SELECTORS:
             try:
-                search_input = wait.until(EC.presence_of_element_located((selector_type, selector_value)))
+                search_input = _wait_long.until(EC.presence_of_element_located((selector_type, selector_value)))
                 print(f"  Found search input (presence) using: {selector_type} = {selector_value}")
                 break
             except TimeoutException:
@@ -158,7 +484,7 @@ def search_city(city_name):
         # If found by presence, wait for it to be clickable
         if search_input:
             try:
-                wait.until(EC.element_to_be_clickable(search_input))
+                _wait_long.until(EC.element_to_be_clickable(search_input))
             except TimeoutException:
                 # If not clickable, try to make it clickable by removing overlays
                 driver.execute_script("arguments[0].style.zIndex = '9999';", search_input)
@@ -167,7 +493,7 @@ def search_city(city_name):
         # If still not found, try finding in search form
         if not search_input:
             try:
-                search_form = wait.until(EC.presence_of_element_located((By.ID, "searchform")))
+                search_form = _wait_long.until(EC.presence_of_element_located((By.ID, "searchform")))
                 # Try to find input within the form
                 inputs = search_form.find_elements(By.TAG_NAME, "input")
                 for inp in inputs:
@@ -196,31 +522,27 @@ def search_city(city_name):
             try:
                 driver.save_screenshot("output/search_input_error.png")
                 print(f"  [DEBUG] Screenshot saved to output/search_input_error.png")
-            except:
+            except WebDriverException:
                 pass
             raise Exception("Could not locate search input element. Website structure may have changed.")
         
         # Scroll to element and ensure it's visible
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", search_input)
-        time.sleep(1)
         
         # Close popups again after scrolling (in case they reappeared)
         close_popup_if_exists()
-        time.sleep(0.5)
         
         # Try to clear using JavaScript if regular clear doesn't work
         try:
             search_input.clear()
-        except:
+        except WebDriverException:
             driver.execute_script("arguments[0].value = '';", search_input)
-        time.sleep(0.5)
         
         # Click on the input first to ensure it's focused
         try:
             search_input.click()
-        except:
+        except WebDriverException:
             driver.execute_script("arguments[0].click();", search_input)
-        time.sleep(0.5)
         
         # Type city name - try regular typing first, fallback to JavaScript if needed
         try:
@@ -235,42 +557,35 @@ def search_city(city_name):
             # Trigger input event to show suggestions
             driver.execute_script("arguments[0].dispatchEvent(new Event('input', { bubbles: true }));", search_input)
         
-        # Wait for dropdown suggestions
-        time.sleep(2)
-        
-        # Try to click first suggestion if it's a city/locality
+        # Wait for dropdown suggestions, then click the first one if it's a city/locality
         try:
-            suggestions = driver.find_elements(By.CSS_SELECTOR, "#suggestions_custom li, .component__inPageAutoSuggSlide li")
-            if suggestions and len(suggestions) > 0:
-                first_suggestion = suggestions[0]
-                print(f"  Clicking suggestion: {first_suggestion.text}")
-                first_suggestion.click()
-                time.sleep(1)
+            first_suggestion = _wait_short.until(EC.visibility_of_element_located(
+                (By.CSS_SELECTOR, "#suggestions_custom li, .component__inPageAutoSuggSlide li")
+            ))
+            print(f"  Clicking suggestion: {first_suggestion.text}")
+            first_suggestion.click()
         except Exception as e:
             print(f"  No suggestions clicked, proceeding with direct search")
         
         # Find and click search button - try multiple selectors
         search_button = None
-        button_selectors = [
-            (By.ID, "searchform_search_btn"),
-            (By.CSS_SELECTOR, "button[type='submit']"),
-            (By.CSS_SELECTOR, "#searchform button"),
-            (By.CSS_SELECTOR, "input[type='submit']"),
-        ]
-        
-        for selector_type, selector_value in button_selectors:
-            try:
-                search_button = driver.find_element(selector_type, selector_value)
+        for selector_type, selector_value in SEARCH_BUTTON_SELECTORS:
+            buttons = driver.find_elements(selector_type, selector_value)
+            if buttons:
+                search_button = buttons[0]
                 print(f"  Found search button using: {selector_type} = {selector_value}")
                 break
-            except:
-                continue
         
         if not search_button:
             raise Exception("Could not locate search button element.")
         
         driver.execute_script("arguments[0].click();", search_button)
-        time.sleep(3)
+        
+        # Wait for the results page to render its first property card
+        try:
+            _wait_long.until(EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR)))
+        except TimeoutException:
+            print(f"  [INFO] No property cards appeared after searching")
         
         # Close any popup after search
         close_popup_if_exists()
@@ -282,111 +597,81 @@ def search_city(city_name):
         return False
 
 
+def split_heading(heading_text):
+    """Split '2 BHK Flat in Some Locality' into (property type, location)"""
+    parts = HEADING_SPLIT_RE.split(heading_text, 1)
+    if len(parts) == 2:
+        return parts[0].strip(), parts[1].strip()
+    return heading_text, ""
+
+
+@functools.lru_cache(maxsize=None)
+def _css(selector):
+    """Compile a CSS selector for lxml once and reuse it for every card"""
+    return CSSSelector(selector)
+
+
+def _text(el, selector):
+    """Whitespace-normalized text of the first element matching selector, or ''"""
+    found = _css(selector)(el)
+    return " ".join(found[0].text_content().split()) if found else ""
+
+
+def _texts(el, selector):
+    """Whitespace-normalized text of every element matching selector"""
+    return [" ".join(e.text_content().split()) for e in _css(selector)(el)]
+
+
+def _href(el, selector):
+    """Absolute href of the first element matching selector, or ''"""
+    found = _css(selector)(el)
+    href = found[0].get('href') if found else None
+    return urljoin(el.base_url or "", href) if href else ""
+
+
 def extract_regular_card(card):
     """Extract data from regular property card (tupleNew__contentWrap)"""
     property_data = {}
     
     # Extract project/property name
-    try:
-        project_name_elem = card.find_element(By.CLASS_NAME, "tupleNew__locationName")
-        property_data['project_name'] = project_name_elem.text.strip()
-    except:
-        property_data['project_name'] = ""
+    property_data['project_name'] = _text(card, ".tupleNew__locationName")
     
     # Extract property heading (BHK type and location)
-    try:
-        prop_heading = card.find_element(By.CLASS_NAME, "tupleNew__propType")
-        property_data['property_heading'] = prop_heading.text.strip()
-    except:
-        property_data['property_heading'] = ""
+    property_data['property_heading'] = _text(card, ".tupleNew__propType")
     
     # Extract property type and location from heading
-    heading_text = property_data.get('property_heading', '')
-    if ' in ' in heading_text:
-        parts = heading_text.split(' in ', 1)
-        property_data['property_type'] = parts[0].strip()
-        property_data['location'] = parts[1].strip()
-    else:
-        property_data['property_type'] = heading_text
-        property_data['location'] = ""
+    property_data['property_type'], property_data['location'] = split_heading(property_data['property_heading'])
     
     # Extract price
-    try:
-        price_elem = card.find_element(By.CSS_SELECTOR, ".tupleNew__priceValWrap span")
-        property_data['price'] = price_elem.text.strip()
-    except:
-        property_data['price'] = ""
+    property_data['price'] = _text(card, ".tupleNew__priceValWrap span")
     
     # Extract price per sqft
-    try:
-        price_sqft_elem = card.find_element(By.CSS_SELECTOR, ".tupleNew__priceAndPerSqftWrap .tupleNew__perSqftWrap")
-        property_data['price_per_sqft'] = price_sqft_elem.text.strip()
-    except:
-        property_data['price_per_sqft'] = ""
+    property_data['price_per_sqft'] = _text(card, ".tupleNew__priceAndPerSqftWrap .tupleNew__perSqftWrap")
     
     # Extract area
-    try:
-        area_elem = card.find_element(By.CLASS_NAME, "tupleNew__area1Type")
-        property_data['area'] = area_elem.text.strip()
-    except:
-        property_data['area'] = ""
+    area_texts = _texts(card, ".tupleNew__area1Type")
+    property_data['area'] = area_texts[0] if area_texts else ""
     
     # Extract BHK configuration
-    try:
-        bhk_elems = card.find_elements(By.CLASS_NAME, "tupleNew__area1Type")
-        for elem in bhk_elems:
-            if "BHK" in elem.text or "RK" in elem.text:
-                property_data['bhk_config'] = elem.text.strip()
-                break
-        if 'bhk_config' not in property_data:
-            property_data['bhk_config'] = ""
-    except:
-        property_data['bhk_config'] = ""
+    property_data['bhk_config'] = next((t for t in area_texts if "BHK" in t or "RK" in t), "")
     
     # Extract possession status
-    try:
-        possession_elem = card.find_element(By.CLASS_NAME, "tupleNew__possessionBy")
-        property_data['possession_status'] = possession_elem.text.strip()
-    except:
-        property_data['possession_status'] = ""
+    property_data['possession_status'] = _text(card, ".tupleNew__possessionBy")
     
     # Extract property URL
-    try:
-        link_elem = card.find_element(By.CSS_SELECTOR, ".tupleNew__propertyHeading")
-        property_data['property_url'] = link_elem.get_attribute('href')
-    except:
-        property_data['property_url'] = ""
+    property_data['property_url'] = _href(card, ".tupleNew__propertyHeading")
     
     # Extract RERA status
-    try:
-        rera_elem = card.find_element(By.CLASS_NAME, "tupleNew__reraTags")
-        property_data['rera_status'] = "Yes" if rera_elem else "No"
-    except:
-        property_data['rera_status'] = "No"
+    property_data['rera_status'] = "Yes" if _css(".tupleNew__reraTags")(card) else "No"
     
     # Extract property tag (RESALE, NEW, etc.)
-    try:
-        ribbon_elem = card.find_element(By.CLASS_NAME, "tupleNew__ribbon")
-        property_data['property_tag'] = ribbon_elem.text.strip()
-    except:
-        property_data['property_tag'] = ""
+    property_data['property_tag'] = _text(card, ".tupleNew__ribbon")
     
     # Extract highlights
-    try:
-        highlights = []
-        highlight_elems = card.find_elements(By.CLASS_NAME, "tupleNew__unitHighlightTxt")
-        for h in highlight_elems:
-            highlights.append(h.text.strip())
-        property_data['highlights'] = ", ".join(highlights)
-    except:
-        property_data['highlights'] = ""
+    property_data['highlights'] = ", ".join(_texts(card, ".tupleNew__unitHighlightTxt"))
 
     # Extract description
-    try:
-        desc_elem = card.find_element(By.CLASS_NAME, "tupleNew__descText")
-        property_data['description'] = desc_elem.text.strip()
-    except:
-        property_data['description'] = ""
+    property_data['description'] = _text(card, ".tupleNew__descText")
     
     return property_data
 
@@ -396,281 +681,259 @@ def extract_project_card(card):
     property_data = {}
     
     # Extract project name
-    try:
-        project_name_elem = card.find_element(By.CSS_SELECTOR, ".PseudoTupleRevamp__headNrating a")
-        property_data['project_name'] = project_name_elem.text.strip()
-    except:
-        property_data['project_name'] = ""
+    property_data['project_name'] = _text(card, ".PseudoTupleRevamp__headNrating a")
     
     # Extract property heading
-    try:
-        prop_heading = card.find_element(By.CLASS_NAME, "PseudoTupleRevamp__subHeading")
-        property_data['property_heading'] = prop_heading.text.strip()
-    except:
-        property_data['property_heading'] = ""
+    property_data['property_heading'] = _text(card, ".PseudoTupleRevamp__subHeading")
     
     # Extract property type and location from heading
-    heading_text = property_data.get('property_heading', '')
-    if ' in ' in heading_text:
-        parts = heading_text.split(' in ', 1)
-        property_data['property_type'] = parts[0].strip()
-        property_data['location'] = parts[1].strip()
-    else:
-        property_data['property_type'] = heading_text
-        property_data['location'] = ""
+    property_data['property_type'], property_data['location'] = split_heading(property_data['property_heading'])
     
     # Extract price (from configuration card)
-    try:
-        price_elem = card.find_element(By.CLASS_NAME, "configs__ccl2")
-        property_data['price'] = price_elem.text.strip()
-    except:
-        property_data['price'] = ""
+    property_data['price'] = _text(card, ".configs__ccl2")
     
     # No price per sqft in project cards
     property_data['price_per_sqft'] = ""
     
     # Extract BHK config
-    try:
-        bhk_elem = card.find_element(By.CLASS_NAME, "configs__ccl1")
-        property_data['bhk_config'] = bhk_elem.text.strip()
-        property_data['area'] = bhk_elem.text.strip()
-    except:
-        property_data['bhk_config'] = ""
-        property_data['area'] = ""
+    property_data['bhk_config'] = _text(card, ".configs__ccl1")
+    property_data['area'] = property_data['bhk_config']
     
     # Extract possession status (from bottom text)
-    try:
-        possession_elem = card.find_element(By.CSS_SELECTOR, ".ImgItem__fomoWrap span")
-        property_data['possession_status'] = possession_elem.text.strip()
-    except:
-        property_data['possession_status'] = ""
+    property_data['possession_status'] = _text(card, ".ImgItem__fomoWrap span")
     
     # Extract property URL
-    try:
-        link_elem = card.find_element(By.CSS_SELECTOR, ".PseudoTupleRevamp__headNrating a")
-        property_data['property_url'] = link_elem.get_attribute('href')
-    except:
-        property_data['property_url'] = ""
+    property_data['property_url'] = _href(card, ".PseudoTupleRevamp__headNrating a")
     
     # RERA status - usually yes for projects
     property_data['rera_status'] = "Yes"
     
     # Extract property tag (NEW BOOKING, etc.)
-    try:
-        ribbon_elem = card.find_element(By.CLASS_NAME, "PseudoTupleRevamp__ribbon")
-        property_data['property_tag'] = ribbon_elem.text.strip()
-    except:
-        property_data['property_tag'] = ""
+    property_data['property_tag'] = _text(card, ".PseudoTupleRevamp__ribbon")
     
     # Extract nearby/highlights
-    try:
-        highlights = []
-        highlight_elems = card.find_elements(By.CLASS_NAME, "tupleNew__unitHighlightTxt")
-        for h in highlight_elems:
-            highlights.append(h.text.strip())
-        property_data['highlights'] = ", ".join(highlights)
-    except:
-        property_data['highlights'] = ""
+    property_data['highlights'] = ", ".join(_texts(card, ".tupleNew__unitHighlightTxt"))
 
     # Extract description
-    try:
-        desc_elem = card.find_element(By.CLASS_NAME, "tupleNew__descText")
-        property_data['description'] = desc_elem.text.strip()
-    except:
-        property_data['description'] = ""
+    property_data['description'] = _text(card, ".tupleNew__descText")
     
     return property_data
 
 
+def extract_card(card):
+    """Detect the card type inside an outer wrapper and extract its data.
+
+    Returns (property_data, card_type); property_data is None for unknown cards.
+    """
+    # Try to find project card inside
+    project_cards = _css(".PseudoTupleRevamp__tupleWrapProject")(card)
+    if project_cards:
+        return extract_project_card(project_cards[0]), "project"
+    
+    # If not project, try premium/topaz card (premium cards have contentWrap inside)
+    topaz_wraps = _css(".tupleNew__tupleWrapTopaz .tupleNew__contentWrap")(card)
+    if topaz_wraps:
+        return extract_regular_card(topaz_wraps[0]), "premium"
+    
+    # If neither, try regular card
+    content_wraps = _css(".tupleNew__contentWrap")(card)
+    if content_wraps:
+        return extract_regular_card(content_wraps[0]), "regular"
+    
+    return None, "unknown"
+
+
 def extract_property_cards():
     """Extract all property cards from the current page"""
-    properties = []
-    
     try:
         # Wait for property cards to load
-        time.sleep(3)
+        try:
+            _wait.until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR))
+            )
+        except TimeoutException:
+            print(f"  [INFO] No property cards appeared on this page")
+            return []
+        time.sleep(0.2)  # Let the first batch of cards finish rendering
         
-        # Scroll through page to load all cards
+        # Jump to the bottom until the card count stops growing (lazy-loaded cards)
         print(f"  Scrolling to load all cards...")
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        viewport = driver.execute_script("return window.innerHeight")
-        current_pos = 0
-        
-        while current_pos < last_height:
-            current_pos += viewport
-            driver.execute_script(f"window.scrollTo(0, {current_pos});")
-            time.sleep(1)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height > last_height:
-                last_height = new_height
-        
-        # Scroll back to top
-        driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(1)
+        last_count = -1
+        stable_checks = 0
+        for _ in range(SCROLL_MAX_CHECKS):
+            count = driver.execute_script(SCROLL_AND_COUNT_JS, CARD_SELECTOR)
+            if count == last_count:
+                stable_checks += 1
+                if stable_checks >= 2:
+                    break
+            else:
+                stable_checks = 0
+                last_count = count
+            time.sleep(SCROLL_POLL_SECONDS)
+        
+        # Pull just the cards' markup in one script call and parse it in-process;
+        # Selenium is only used for navigation and scrolling, not per-field lookups
+        card_htmls = driver.execute_script(CARDS_HTML_JS, CARD_SELECTOR)
+        tree = lxml.html.fromstring("<div>" + "".join(card_htmls) + "</div>", base_url=driver.current_url)
         
         # Find ALL property cards using the OUTER wrapper - catches everything!
         # Both card types have an outer wrapper ending in __outerTupleWrap
-        all_cards = driver.find_elements(By.XPATH, 
-            "//div[contains(@class, 'outerTupleWrap')]")
+        all_cards = list(tree)
         
-        print(f"  Found {len(all_cards)} property cards total")
+        return parse_property_cards(all_cards)
         
-        # Extract all cards in one loop
-        for idx, card in enumerate(all_cards, 1):
-            try:
-                card_class = card.get_attribute("class")
-                property_data = None
-                card_type = "unknown"
+    except Exception as e:
+        print(f"  [ERROR] Error extracting property cards: {e}")
+        return []
+
+
+def parse_property_cards(all_cards):
+    """Turn parsed card elements into property rows, skipping already-seen listings"""
+    properties = []
+    
+    print(f"  Found {len(all_cards)} property cards total")
+    
+    # Extract all cards in one loop
+    for idx, card in enumerate(all_cards, 1):
+        try:
+            property_data, card_type = extract_card(card)
+            
+            if property_data:
+                # Try to extract description from outer wrapper if not already found
+                if not property_data.get('description'):
+                    property_data['description'] = _text(card, ".tupleNew__descText")
                 
-                # Detect card type by looking inside the outer wrapper
-                # Try to find project card inside
-                try:
-                    project_card = card.find_element(By.CLASS_NAME, "PseudoTupleRevamp__tupleWrapProject")
-                    property_data = extract_project_card(project_card)
-                    card_type = "project"
-                except:
-                    pass
+                # Add scraping metadata ('source' is added at CSV write time)
+                property_data['scraped_at'] = _now_cached()
+                property_data['card_type'] = card_type
                 
-                # If not project, try premium/topaz card
-                if not property_data:
-                    try:
-                        topaz_card = card.find_element(By.CLASS_NAME, "tupleNew__tupleWrapTopaz")
-                        # Premium cards have contentWrap inside
-                        content_wrap = topaz_card.find_element(By.CLASS_NAME, "tupleNew__contentWrap")
-                        property_data = extract_regular_card(content_wrap)
-                        card_type = "premium"
-                    except:
-                        pass
+                # Skip listings already saved (99acres reshuffles cards between pages)
+                url = property_data.get('property_url')
+                if url:
+                    if url in _seen_urls:
+                        continue
+                    _seen_urls.add(url)
                 
-                # If neither, try regular card
-                if not property_data:
+                # Only add if we have at least a project name or property type
+                if property_data.get('project_name') or property_data.get('property_type'):
+                    properties.append(property_data)
+                    # Safe print to handle Unicode characters like ₹
                     try:
-                        content_wrap = card.find_element(By.CLASS_NAME, "tupleNew__contentWrap")
-                        property_data = extract_regular_card(content_wrap)
-                        card_type = "regular"
-                    except:
-                        pass
-                
-                if property_data:
-                    # Try to extract description from outer wrapper if not already found
-                    if not property_data.get('description'):
-                        try:
-                            desc_elem = card.find_element(By.CLASS_NAME, "tupleNew__descText")
-                            property_data['description'] = desc_elem.text.strip()
-                        except:
-                            pass
-                    
-                    # Add scraping metadata
-                    property_data['scraped_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    property_data['source'] = "99acres"
-                    property_data['card_type'] = card_type
-                    
-                    # Only add if we have at least a project name or property type
-                    if property_data.get('project_name') or property_data.get('property_type'):
-                        properties.append(property_data)
-                        # Safe print to handle Unicode characters like ₹
-                        try:
-                            project_name = str(property_data.get('project_name', 'N/A'))[:50]
-                            price = str(property_data.get('price', 'N/A'))[:40]
-                            # Try to print normally first
-                            print(f"    [{idx}] {card_type.upper()}: {project_name} - {price}")
-                        except UnicodeEncodeError:
-                            # If it fails, encode Unicode characters safely
-                            project_name_safe = project_name.encode('ascii', 'replace').decode('ascii')
-                            price_safe = price.encode('ascii', 'replace').decode('ascii')
-                            print(f"    [{idx}] {card_type.upper()}: {project_name_safe} - {price_safe}")
-                
-            except Exception as e:
-                # Safe error message - encode Unicode characters before printing
-                # This is critical because the error message itself might contain Unicode (like ₹)
+                        project_name = str(property_data.get('project_name', 'N/A'))[:50]
+                        price = str(property_data.get('price', 'N/A'))[:40]
+                        # Try to print normally first
+                        print(f"    [{idx}] {card_type.upper()}: {project_name} - {price}")
+                    except UnicodeEncodeError:
+                        # If it fails, encode Unicode characters safely
+                        project_name_safe = project_name.encode('ascii', 'replace').decode('ascii')
+                        price_safe = price.encode('ascii', 'replace').decode('ascii')
+                        print(f"    [{idx}] {card_type.upper()}: {project_name_safe} - {price_safe}")
+            
+        except Exception as e:
+            # Safe error message - encode Unicode characters before printing
+            # This is critical because the error message itself might contain Unicode (like ₹)
+            try:
+                error_str = repr(e)  # Use repr() to get a safe representation
+                # Try to encode to see if it contains problematic Unicode
                 try:
-                    error_str = repr(e)  # Use repr() to get a safe representation
-                    # Try to encode to see if it contains problematic Unicode
-                    try:
-                        error_str.encode('ascii', 'strict')
-                        # Safe to print
-                        print(f"    [WARNING] Error extracting card {idx}: {error_str}")
-                    except (UnicodeEncodeError, UnicodeDecodeError):
-                        # Contains Unicode - encode it safely
-                        safe_error = error_str.encode('ascii', 'replace').decode('ascii')
-                        print(f"    [WARNING] Error extracting card {idx}: {safe_error}")
-                except Exception:
-                    # Last resort - use generic message
-                    print(f"    [WARNING] Error extracting card {idx}: [Encoding error - check logs]")
-                continue
-        
-        return properties
-        
-    except Exception as e:
-        print(f"  [ERROR] Error extracting property cards: {e}")
-        return []
+                    error_str.encode('ascii', 'strict')
+                    # Safe to print
+                    print(f"    [WARNING] Error extracting card {idx}: {error_str}")
+                except (UnicodeEncodeError, UnicodeDecodeError):
+                    # Contains Unicode - encode it safely
+                    safe_error = error_str.encode('ascii', 'replace').decode('ascii')
+                    print(f"    [WARNING] Error extracting card {idx}: {safe_error}")
+            except Exception:
+                # Last resort - use generic message
+                print(f"    [WARNING] Error extracting card {idx}: [Encoding error - check logs]")
+            continue
+    
+    return properties
 
 
-def check_and_go_to_next_page():
-    """Check if next page exists and navigate to it"""
+def find_next_page_url():
+    """Return the 'Next Page >' URL of the page open in the browser, or None"""
     try:
         # Scroll to bottom to ensure pagination is visible
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
         
         # Find pagination container
         try:
-            pagination = driver.find_element(By.CLASS_NAME, "Pagination__srpPagination")
-        except:
+            _wait_short.until(
+                EC.presence_of_element_located((By.CLASS_NAME, "Pagination__srpPagination"))
+            )
+        except TimeoutException:
             print(f"  [INFO] No pagination found (might be last page)")
-            return False
+            return None
         
-        # Find "Next Page >" link within pagination
-        next_page_href = None
-        try:
-            # Get all links in pagination
-            links = pagination.find_elements(By.TAG_NAME, "a")
-            
-            # Find the "Next Page >" link (the last div's link)
-            for link in links:
-                link_text = link.text.strip()
-                if "Next Page" in link_text and ">" in link_text:
-                    next_page_href = link.get_attribute("href")
-                    print(f"  Found 'Next Page >' link")
-                    break
-        except Exception as e:
-            print(f"  Error finding Next Page link: {e}")
-            return False
+        # Get text and href of all pagination links in one round trip
+        links = driver.execute_script(PAGINATION_LINKS_JS)
         
-        if next_page_href:
-            print(f"  [INFO] Navigating to: {next_page_href}")
-            
-            # Navigate directly to the next page URL
-            driver.get(next_page_href)
-            
-            # Wait for page to load
-            time.sleep(4)
-            
-            # Close any popups
-            close_popup_if_exists()
-            
-            print(f"  [OK] Successfully navigated to next page")
-            return True
-        else:
-            print(f"  [INFO] No 'Next Page' link found (reached end)")
-            return False
+        # Find the "Next Page >" link (the last div's link)
+        for link in links:
+            if "Next Page" in link['text'] and ">" in link['text']:
+                print(f"  Found 'Next Page >' link")
+                return link['href']
+        
+        print(f"  [INFO] No 'Next Page' link found (reached end)")
+        return None
         
     except Exception as e:
-        print(f"  [WARNING] Error navigating to next page: {e}")
-        return False
+        print(f"  [WARNING] Error finding next page: {e}")
+        return None
+
+
+def find_next_page_url_in_tree(tree):
+    """Return the 'Next Page >' URL from a page fetched over HTTP, or None"""
+    for link in _css(".Pagination__srpPagination a")(tree):
+        text = link.text_content()
+        if "Next Page" in text and ">" in text and link.get('href'):
+            return urljoin(tree.base_url or "", link.get('href'))
+    print(f"  [INFO] No 'Next Page' link found (reached end)")
+    return None
+
+
+def fetch_page_tree(url):
+    """Fetch a results page over plain HTTP with the browser's cookies and parse it.
+
+    Returns the lxml tree, or None if the request failed.
+    """
+    try:
+        for cookie in driver.get_cookies():
+            _http.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+        response = _http.get(url, timeout=20)
+        response.raise_for_status()
+    except (requests.RequestException, WebDriverException) as e:
+        print(f"  [WARNING] HTTP fetch failed, using the browser for this page: {e}")
+        return None
+    return lxml.html.fromstring(response.content, base_url=response.url)
 
 
 def scrape_city_properties(city_name):
     """Scrape all properties for a specific city"""
+    global _http_pages_ok
     all_properties = []
     
+    # Start each city in a fresh tab of the same browser
+    try:
+        open_fresh_tab()
+    except WebDriverException as e:
+        print(f"  [ERROR] Could not open a new tab for {city_name}: {e}")
+        return all_properties
+    
     # Search for the city
     if not search_city(city_name):
         return all_properties
     
-    # Scrape multiple pages
+    # Scrape multiple pages. Page 1 is always read from the browser; later pages
+    # are fetched over plain HTTP while that keeps returning server-rendered cards
     page_num = 1
+    next_url = None  # None = the page to read is already open in the browser
     while True:
+        if _stop_event.is_set():
+            print(f"\n  [INFO] Stop requested, leaving {city_name} after {page_num - 1} page(s)")
+            break
+        
         # Check if we've reached the page limit (if set)
         if MAX_PAGES_PER_CITY is not None and page_num > MAX_PAGES_PER_CITY:
             print(f"\n  [INFO] Reached MAX_PAGES_PER_CITY ({MAX_PAGES_PER_CITY}), stopping")
@@ -679,7 +942,26 @@ def scrape_city_properties(city_name):
         print(f"\n  Page {page_num}:")
         
         # Extract properties from current page
-        properties = extract_property_cards()
+        tree = fetch_page_tree(next_url) if next_url and _http_pages_ok else None
+        cards = _css(CARD_SELECTOR)(tree) if tree is not None else []
+        if cards:
+            properties = parse_property_cards(cards)
+        else:
+            if tree is not None:
+                print(f"  [INFO] Fetched page has no server-rendered cards, using the browser from now on")
+                _http_pages_ok = False
+                tree = None
+            if next_url:
+                # (the RERA popup is dismissed in-page by POPUP_OBSERVER_JS)
+                # driver.get() returns after the load event; extract_property_cards()
+                # then waits for the first card before reading the page
+                print(f"  [INFO] Navigating to: {next_url}")
+                try:
+                    driver.get(next_url)
+                except WebDriverException as e:
+                    print(f"  [WARNING] Error navigating to next page: {e}")
+                    break
+            properties = extract_property_cards()
         
         # Add city name to each property
         for prop in properties:
@@ -687,166 +969,346 @@ def scrape_city_properties(city_name):
         
         all_properties.extend(properties)
         
-        # Save to CSV after each page
+        # Hand this page's rows to the parent's CSV writer thread and move on
         if properties:
-            # Read existing data
-            existing_properties = []
-            try:
-                with open("output/99acres_properties.csv", 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    existing_properties = list(reader)
-            except FileNotFoundError:
-                pass  # File doesn't exist yet
-            
-            # Append new properties
-            existing_properties.extend(properties)
-            
-            # Save all data
-            save_to_csv(existing_properties, "output/99acres_properties.csv")
-            print(f"  [SAVED] Saved {len(properties)} properties from this page (Total: {len(existing_properties)})")
+            _csv_queue.put(properties)
+            print(f"  [SAVED] Queued {len(properties)} properties from this page for the CSV (City total: {len(all_properties)})")
         
         # Increment page counter
         page_num += 1
         
-        # Try to go to next page
-        if not check_and_go_to_next_page():
+        # Find the next page in whichever copy of this page we just read
+        next_url = find_next_page_url_in_tree(tree) if tree is not None else find_next_page_url()
+        if not next_url:
             print(f"\n  [INFO] No more pages available, stopping")
             break
         
-        time.sleep(2)  # Delay between pages
+        _stop_event.wait(2)  # Delay between pages (cut short by a stop request)
     
     print(f"\n  [OK] Total properties found in {city_name}: {len(all_properties)}")
     return all_properties
 
 
-def save_to_csv(properties, filename="output/99acres_properties.csv"):
-    """Save all properties to CSV file"""
-    if not properties:
-        print("\n[WARNING] No properties to save")
-        return
-    
+def csv_writer_loop(csv_queue, csv_lock, parquet_path, filename="output/99acres_properties.csv"):
+    """Writer thread in the parent: append every batch of rows the workers queue.
+
+    The CSV is opened once in append mode and the header is written only if it
+    is new or empty. Rows are written CSV_BATCH_ROWS at a time through a large
+    file buffer, and go to this run's Parquet file in batches of
+    PARQUET_BATCH_ROWS. A None batch stops the loop and writes what is left.
+    """
     # Ensure output directory exists
     os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else "output", exist_ok=True)
     
-    # Define CSV columns - full structure with all extracted data
-    fieldnames = [
-        'project_name',
-        'property_heading',
-        'property_type',
-        'city',
-        'location',
-        'price',
-        'price_per_sqft',
-        'area',
-        'bhk_config',
-        'possession_status',
-        'rera_status',
-        'property_tag',
-        'highlights',
-        'description',
-        'property_url',
-        'card_type',
-        'scraped_at',
-        'source'
-    ]
-    
-    # Write to CSV
-    with open(filename, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(properties)
+    parquet_writer = None
+    parquet_rows = []
     
-    print(f"\n[OK] Saved {len(properties)} properties to {filename}")
+    def flush_parquet():
+        nonlocal parquet_writer
+        if not parquet_rows:
+            return
+        if parquet_writer is None:
+            parquet_writer = pq.ParquetWriter(parquet_path, PARQUET_SCHEMA, compression="zstd")
+        parquet_writer.write_table(pa.Table.from_pylist(parquet_rows, schema=PARQUET_SCHEMA))
+        parquet_rows.clear()
+    
+    try:
+        with open(filename, 'a', encoding='utf-8', newline='', buffering=CSV_BUFFER_BYTES) as f, \
+                open(SEEN_URLS_FILE, 'a', encoding='utf-8', buffering=CSV_BUFFER_BYTES) as urls_f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+            if f.tell() == 0:
+                writer.writeheader()
+            
+            csv_rows = []
+            
+            def flush_csv():
+                # The lock keeps workers starting up from reading a half-written URL index
+                with csv_lock:
+                    writer.writerows(csv_rows)
+                    urls_f.writelines(row['property_url'] + "\n" for row in csv_rows if row.get('property_url'))
+                csv_rows.clear()
+            
+            try:
+                while True:
+                    properties = csv_queue.get()
+                    if properties is None:
+                        break
+                    rows = [{**prop, 'source': SOURCE} for prop in properties]
+                    
+                    csv_rows.extend(rows)
+                    if len(csv_rows) >= CSV_BATCH_ROWS:
+                        flush_csv()
+                    
+                    parquet_rows.extend(rows)
+                    if len(parquet_rows) >= PARQUET_BATCH_ROWS:
+                        flush_parquet()
+            finally:
+                flush_csv()
+    finally:
+        flush_parquet()
+        if parquet_writer is not None:
+            parquet_writer.close()
 
 
-def upload_csv_to_s3():
-    """Upload CSV file to S3"""
+def stop_csv_writer(csv_queue, writer_thread):
+    """Let the writer thread drain the queue, then wait for it to close the files.
+
+    Call only after the workers have been joined. The writer is a daemon thread,
+    so it is joined without a timeout: returning early would let the process
+    exit with rows still unwritten.
+    """
+    if not writer_thread.is_alive():
+        print("[WARNING] CSV writer thread already stopped; rows still queued were not written")
+        return
+    csv_queue.put(None)
+    writer_thread.join()
+
+
+def get_s3_client():
+    """Return the shared boto3 S3 client, creating it on first use"""
+    global _s3_client
+    # Uploads run on several threads and boto3's client creation isn't thread-safe
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.client("s3")
+        return _s3_client
+
+
+def s3_key_for(name, extension):
+    """Build the S3 key <prefix>/<name>_<utc timestamp>.<extension>"""
+    # key_prefix = os.getenv('S3_KEY')
+    key_prefix = "test_apf_apis/"
+    
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    return f"{key_prefix.rstrip('/')}/{name}_{timestamp}.{extension}"
+
+
+def upload_file_to_s3(path, extension, content_type, name="99acres_properties", compress=False):
+    """Upload an output file to S3 as <name>_<timestamp>.<extension>
+
+    With compress=True the file is gzipped to a temporary copy first and stored
+    as <name>_<timestamp>.<extension>.gz with Content-Encoding: gzip.
+    """
+    gz_path = None
     try:
-        csv_path = "output/99acres_properties.csv"
-        
-        # Check if CSV file exists
-        if not os.path.exists(csv_path):
-            print(f"[WARNING] CSV file not found: {csv_path}, skipping S3 upload")
+        # Check if file exists
+        if not os.path.exists(path):
+            print(f"[WARNING] File not found: {path}, skipping S3 upload")
             return
         
         # Check if file is empty
-        if os.path.getsize(csv_path) == 0:
-            print(f"[WARNING] CSV file is empty, skipping S3 upload")
+        if os.path.getsize(path) == 0:
+            print(f"[WARNING] {path} is empty, skipping S3 upload")
             return
         
-        load_dotenv()
-        bucket = os.getenv('S3_BUCKET_NAME')
+        bucket = S3_BUCKET_NAME
         if not bucket:
             print(f"[ERROR] S3_BUCKET_NAME not set in environment, skipping S3 upload")
             return
         
-        # key_prefix = os.getenv('S3_KEY')
-        key_prefix = "test_apf_apis/"
+        s3_key = s3_key_for(name, extension)
+        extra_args = {"ContentType": content_type}
         
-        with open(csv_path, 'rb') as f:
-            csv_content = f.read()
+        # Scraped CSVs are mostly repeated text and shrink several times under gzip
+        if compress:
+            gz_path = f"{path}.gz"
+            with open(path, 'rb') as fin, gzip.open(gz_path, 'wb', compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, length=1 << 20)
+            s3_key += ".gz"
+            extra_args["ContentEncoding"] = "gzip"
         
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        s3_key = f"{key_prefix.rstrip('/')}/99acres_properties_{timestamp}.csv"
-        
-        s3 = boto3.client("s3")
-        s3.put_object(
+        # Streams from disk; files over the threshold go up as parallel multipart parts
+        s3 = get_s3_client()
+        s3.upload_file(
+            Filename=gz_path or path,
             Bucket=bucket,
             Key=s3_key,
-            Body=csv_content,
-            ContentType="text/csv"
+            ExtraArgs=extra_args,
+            Config=S3_TRANSFER_CONFIG,
+        )
+        
+        print(f"[OK] {extension.upper()} uploaded to S3: {s3_key}")
+    except Exception as e:
+        print(f"[ERROR] Error uploading {path} to S3: {str(e)}")
+    finally:
+        if gz_path and os.path.exists(gz_path):
+            os.remove(gz_path)
+
+
+def upload_csv_to_s3():
+    """Upload CSV file to S3"""
+    upload_file_to_s3("output/99acres_properties.csv", "csv", "text/csv", compress=True)
+
+
+def city_csv_gzip(properties):
+    """Render one city's rows as a gzipped CSV in memory and return the buffer"""
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6) as gz, \
+            io.TextIOWrapper(gz, encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows({**prop, 'source': SOURCE} for prop in properties)
+    buf.seek(0)
+    return buf
+
+
+def upload_city_csv_to_s3(city_name, properties):
+    """Upload one city's rows from this run as 99acres_<city>_<timestamp>.csv.gz
+
+    The CSV is built in memory, so nothing is written to (or read back from) disk.
+    """
+    try:
+        bucket = S3_BUCKET_NAME
+        if not bucket:
+            print(f"[ERROR] S3_BUCKET_NAME not set in environment, skipping S3 upload")
+            return
+        
+        city_slug = re.sub(r"[^a-z0-9]+", "_", city_name.lower()).strip("_")
+        s3_key = s3_key_for(f"99acres_{city_slug}", "csv.gz")
+        
+        s3 = get_s3_client()
+        s3.upload_fileobj(
+            city_csv_gzip(properties),
+            bucket,
+            s3_key,
+            ExtraArgs={"ContentType": "text/csv", "ContentEncoding": "gzip"},
+            Config=S3_TRANSFER_CONFIG,
         )
         
-        print(f"[OK] CSV uploaded to S3: {s3_key}")
+        print(f"[OK] CSV for {city_name} uploaded to S3: {s3_key}")
     except Exception as e:
-        print(f"[ERROR] Error uploading CSV to S3: {str(e)}")
+        print(f"[ERROR] Error uploading {city_name} CSV to S3: {str(e)}")
+
+
+def scrape_city_task(city_name):
+    """Pool task: scrape one city in this worker's browser.
+
+    Returns (city_name, rows, results URL or None) so the parent can upload
+    the city's rows and keep the learned URL map up to date.
+    """
+    if _stop_event.is_set():
+        return city_name, [], _city_urls.get(city_name)
+    properties = scrape_city_properties(city_name)
+    _stop_event.wait(3)  # Delay between cities (cut short by a stop request)
+    return city_name, properties, _city_urls.get(city_name)
+
+
+# Set when the run is stopped by SIGTERM rather than Ctrl+C
+_stopped_by_sigterm = False
+
+
+def _stop_on_sigterm(signum, frame):
+    """SIGTERM (the API's /stop) takes the Ctrl+C path, so buffered rows are written and files closed"""
+    global _stopped_by_sigterm
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)  # don't interrupt the cleanup itself
+    _stopped_by_sigterm = True
+    raise KeyboardInterrupt
 
 
 def main():
     """Main function to scrape properties from multiple cities"""
-    all_properties = []
+    global _csv_lock
+    total_properties = 0
+    workers = max(1, min(CITY_WORKERS, len(CITIES_TO_SEARCH)))
     
     print("\n" + "="*60)
     print("99ACRES PROPERTY SCRAPER")
     print("="*60)
     print(f"Cities to scrape: {', '.join(CITIES_TO_SEARCH)}")
     print(f"Max pages per city: {'Unlimited (All pages)' if MAX_PAGES_PER_CITY is None else MAX_PAGES_PER_CITY}")
+    print(f"Parallel browsers: {workers}")
     print("="*60)
     
+    _csv_lock = multiprocessing.Lock()
+    city_urls = load_city_urls()
+    ensure_seen_urls_index()
+    
+    # Workers queue each page's rows; one thread here does all the CSV/Parquet writing
+    run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    parquet_path = f"output/99acres_properties_{run_ts}.parquet"
+    csv_queue = multiprocessing.Queue(maxsize=1000)
+    stop_event = multiprocessing.Event()
+    writer_thread = threading.Thread(target=csv_writer_loop, args=(csv_queue, _csv_lock, parquet_path), daemon=True)
+    writer_thread.start()
+    
+    upload_pool = ThreadPoolExecutor(max_workers=2)
+    pool = multiprocessing.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(_csv_lock, csv_queue, stop_event, multiprocessing.Value('i', 0)),
+    )
+    # The API's /stop sends SIGTERM; turn it into the interrupt path below
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    
     try:
-        for city in CITIES_TO_SEARCH:
-            properties = scrape_city_properties(city)
-            all_properties.extend(properties)
+        for city, properties, results_url in pool.imap_unordered(scrape_city_task, CITIES_TO_SEARCH):
+            count = len(properties)
+            total_properties += count
             
-            print(f"\n  [PROGRESS] {len(properties)} properties from {city} (Total: {len(all_properties)})")
+            if city_urls.get(city) != results_url:
+                if results_url:
+                    city_urls[city] = results_url
+                else:
+                    city_urls.pop(city, None)
+                save_city_urls(city_urls)
             
-            # Upload CSV to S3 after each city completes
-            print(f"\n  [INFO] Uploading CSV to S3 after completing {city}...")
-            upload_csv_to_s3()
+            print(f"\n  [PROGRESS] {count} properties from {city} (Total: {total_properties})")
             
-            time.sleep(3)  # Delay between cities
+            # Upload just this city's rows; the full CSV is uploaded once at the end
+            if properties:
+                print(f"\n  [INFO] Uploading {city} CSV to S3...")
+                # In the background, so the next result is handled without waiting on S3;
+                # the rows list is never touched again here, so no copy is needed
+                upload_pool.submit(upload_city_csv_to_s3, city, properties)
+        
+        # Workers flush their queued rows on exit, so join them before stopping the writer
+        pool.close()
+        pool.join()
+        stop_csv_writer(csv_queue, writer_thread)
         
         print("\n" + "="*60)
         print(f"[COMPLETED] SCRAPING COMPLETED!")
-        print(f"Total properties scraped: {len(all_properties)}")
-        print(f"Saved to: output/99acres_properties.csv")
+        print(f"Total properties scraped: {total_properties}")
+        print(f"Saved to: output/99acres_properties.csv and {parquet_path}")
         print("="*60)
         
         upload_csv_to_s3()
+        upload_file_to_s3(parquet_path, "parquet", "application/vnd.apache.parquet")
         
     except KeyboardInterrupt:
-        print("\n\n[WARNING] Scraping interrupted by user")
-        print(f"Data already saved per page. {len(all_properties)} properties were collected.")
-        upload_csv_to_s3()
+        # Ask the workers to stop after their current page and wait for them, so every
+        # row they queued is in the queue before the writer's sentinel
+        print("\n\n[INFO] Stopping: waiting for workers to finish their current page...")
+        stop_event.set()
+        pool.close()
+        pool.join()
+        stop_csv_writer(csv_queue, writer_thread)
+        print("\n\n[WARNING] Scraping interrupted")
+        print(f"Rows received so far were written to output/99acres_properties.csv and {parquet_path}. {total_properties} properties were collected from finished cities.")
+        # /stop only waits a limited time before it SIGKILLs the group, so don't risk being
+        # killed mid-upload. The files stay in output/, and the next run uploads the whole CSV
+        if _stopped_by_sigterm:
+            print("[INFO] Stopped by SIGTERM, skipping the S3 uploads")
+        else:
+            upload_csv_to_s3()
+            upload_file_to_s3(parquet_path, "parquet", "application/vnd.apache.parquet")
     
     except Exception as e:
+        stop_event.set()
+        pool.close()
+        pool.join()
+        stop_csv_writer(csv_queue, writer_thread)
         print(f"\n[ERROR] Error in main execution: {e}")
-        print(f"Data already saved per page. {len(all_properties)} properties were collected.")
+        print(f"Rows received so far were written to output/99acres_properties.csv and {parquet_path}. {total_properties} properties were collected from finished cities.")
         upload_csv_to_s3()
+        upload_file_to_s3(parquet_path, "parquet", "application/vnd.apache.parquet")
     
     finally:
-        driver.quit()
-        print("\n[INFO] Browser closed")
+        pool.join()
+        print("\n[INFO] Browsers closed")
+        # Let queued per-city uploads finish before the process exits (after SIGTERM, only
+        # the ones already in progress)
+        upload_pool.shutdown(wait=True, cancel_futures=_stopped_by_sigterm)
 
 
 if __name__ == "__main__":
@@ -1,21 +1,40 @@
 import sys
 import subprocess
 import os
-import time
+import signal
+import itertools
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
 from typing import Literal
-import psutil
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 
 # Setup
 BASE_DIR = Path(__file__).parent
 OUT_DIR = BASE_DIR / "output"
 OUT_DIR.mkdir(exist_ok=True)
 
-# Track active scraper processes
-_active_processes: dict[str, dict] = {}
+@dataclass(slots=True)
+class RunInfo:
+    """A tracked scraper run"""
+    bank: str
+    pid: int
+    log_file: str
+    started_at: str
+    process: subprocess.Popen
+
+
+# Track active scraper processes (entries are removed by each run's reaper thread)
+_active_processes: dict[str, RunInfo] = {}
+_pid_to_runid: dict[int, str] = {}  # reverse index so /stop can look up by PID directly
+_processes_lock = threading.Lock()
+# Per-process sequence appended to run ids, so two starts in the same second never collide
+_run_counter = itertools.count(1)
+# Makes the "already running?" check and the launch of a 99acres run one step
+_acres99_start_lock = threading.Lock()
 
 
 # Map friendly bank names to script files in this folder
@@ -29,139 +48,108 @@ BANK_TO_SCRIPT = {
 }
 
 
-def resolve_script(bank: str) -> Path:
-    script = BANK_TO_SCRIPT.get(bank.lower())
-    if not script:
-        raise KeyError(bank)
-    path = BASE_DIR / script
-    if not path.exists():
-        raise FileNotFoundError(str(path))
-    return path
+def _existing_scripts(bank_to_script: dict[str, str]) -> dict[str, Path]:
+    """Resolve script names to paths once at startup, skipping (and reporting) missing files"""
+    resolved = {}
+    for bank, script in bank_to_script.items():
+        path = BASE_DIR / script
+        if path.exists():
+            resolved[bank] = path
+        else:
+            print(f"[WARNING] Scraper script for '{bank}' not found: {path}")
+    return resolved
+
+
+# Environment for scraper subprocesses, built once instead of per launch.
+# Output is block-buffered (one write per ~8KB instead of per print); the image sets
+# PYTHONUNBUFFERED for the API's own logs, so drop it for the scrapers
+CHILD_ENV = {k: v for k, v in os.environ.items() if k != "PYTHONUNBUFFERED"}
 
+SCRIPT_FILES = {**BANK_TO_SCRIPT, "99acres": "acres99_property_scraper.py"}
+SCRIPT_PATHS = _existing_scripts(SCRIPT_FILES)
+# Launch argv per scraper and the working directory, frozen once so a start request
+# doesn't rebuild them
+SCRIPT_ARGV = {name: (sys.executable, str(path)) for name, path in SCRIPT_PATHS.items()}
+BASE_DIR_STR = str(BASE_DIR)
 
-app = FastAPI(title="Bank APF Scrapers API")
+# Seconds /stop waits after SIGTERM before it SIGKILLs the group. 99acres handles
+# SIGTERM: its workers finish the page in hand and it flushes and closes its CSV and
+# Parquet files, which takes far longer than the other scrapers need to exit
+STOP_GRACE_SECONDS = {"99acres": int(os.getenv("ACRES99_STOP_GRACE_SECONDS", "90"))}
+DEFAULT_STOP_GRACE_SECONDS = 5
+
+
+app = FastAPI(title="Bank APF Scrapers API", default_response_class=ORJSONResponse)
 
 @app.get("/")
-def welcome():
+async def welcome():
     return {"status": 200, "message": "Welcome to the Bank APF Scrapers API"}
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
-def cleanup_finished_processes():
-    """Remove finished processes from tracking and close log file handles"""
-    finished = []
-    for run_id, info in _active_processes.items():
-        proc = info.get("process")
-        pid = info.get("pid")
-        
-        # Method 1: Use subprocess.Popen.poll() - most reliable
-        # poll() returns None if process is still running, or returncode if finished
-        if proc is not None:
-            returncode = proc.poll()
-            if returncode is not None:
-                # Process has finished (returncode is 0 for success, non-zero for error)
-                finished.append(run_id)
-                continue
-        
-        # Method 2: Fallback to psutil check (for cases where proc object might be lost)
-        # Check if process exists and is actually running (not zombie)
-        try:
-            process = psutil.Process(pid)
-            status = process.status()
-            # Check if process is actually running (not zombie, dead, or zombie)
-            if status in (psutil.STATUS_ZOMBIE, psutil.STATUS_DEAD):
-                finished.append(run_id)
-            elif not process.is_running():
-                finished.append(run_id)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            # Process doesn't exist anymore
-            finished.append(run_id)
-        except Exception:
-            # For any other exception, try to check via poll if we have proc
-            if proc is not None:
-                try:
-                    if proc.poll() is not None:
-                        finished.append(run_id)
-                except Exception:
-                    # If all checks fail, assume process is finished
-                    finished.append(run_id)
-    
-    for run_id in finished:
-        info = _active_processes.pop(run_id, None)
-        if info:
-            # Close log file handle
-            if "log_file_handle" in info:
-                try:
-                    info["log_file_handle"].close()
-                except Exception:
-                    pass  # File may already be closed
-            
-            # Clean up subprocess object (just wait for it to finish if still running)
-            if "process" in info:
-                proc = info["process"]
-                try:
-                    # If process is still running (shouldn't happen, but just in case)
-                    if proc.poll() is None:
-                        # Give it a moment, then check again
-                        try:
-                            proc.wait(timeout=1)
-                        except subprocess.TimeoutExpired:
-                            # If it's still running after timeout, it might be stuck
-                            # Log but don't kill - let the OS handle it
-                            pass
-                except Exception:
-                    pass
+def _reap(run_id: str, proc: subprocess.Popen):
+    """Block until the scraper exits, then drop it from tracking"""
+    proc.wait()
+    with _processes_lock:
+        _active_processes.pop(run_id, None)
+        # The PID may already belong to a newer run once this one is reaped
+        if _pid_to_runid.get(proc.pid) == run_id:
+            del _pid_to_runid[proc.pid]
 
 
-@app.post("/scrape-apf/{bank}")
-def start_scrape(bank: Literal["axis","canara","federal","hsbc","icici_hfc","ucorealty"]):
-    try:
-        script_path = resolve_script(bank)
-    except (KeyError, FileNotFoundError):
-        raise HTTPException(status_code=404, detail=f"Unknown or missing scraper for bank '{bank}'")
+def start_reaper(run_id: str, proc: subprocess.Popen):
+    """Start a daemon thread that untracks the run as soon as its process exits"""
+    threading.Thread(target=_reap, args=(run_id, proc), daemon=True).start()
 
-    # Clean up finished processes
-    cleanup_finished_processes()
 
-    # Per-run log file with timestamp to ensure uniqueness
+def launch_scraper(bank: str, argv: tuple[str, str]) -> tuple[str, subprocess.Popen, Path]:
+    """Start a scraper script in the background, track it, and return (run_id, process, log file)"""
+    # Per-run log file named after the run id (timestamp plus sequence number)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = OUT_DIR / f"run_{bank}_{ts}.log"
+    run_id = f"{bank}_{ts}_{next(_run_counter)}"
+    log_file = OUT_DIR / f"run_{run_id}.log"
 
-    # Open log file in unbuffered mode for real-time logging
-    log_file_handle = log_file.open("w", encoding="utf-8", newline="", buffering=1)
-    
-    # Launch the scraper as a background subprocess to avoid blocking the API worker
-    # Use -u flag for unbuffered Python output + PYTHONUNBUFFERED for real-time logs
-    env = os.environ.copy()
-    env["PYTHONUNBUFFERED"] = "1"
-    
-    proc = subprocess.Popen(
-        [sys.executable, "-u", str(script_path)],  # -u flag = unbuffered stdout/stderr
-        cwd=str(BASE_DIR),
-        stdout=log_file_handle,
-        stderr=subprocess.STDOUT,
-        bufsize=1,  # Line buffered for real-time output
-        universal_newlines=True,
-        env=env,
-    )
-    
-    # Store file handle reference so it stays open during subprocess lifetime
-    # The handle will be closed when the process terminates
+    # Launch the scraper as a background subprocess to avoid blocking the API worker.
+    # Only the child ever writes the log, so hand it a raw descriptor (no Python file
+    # object); the child gets its own copy on fd 1/2, so ours is closed right away
+    log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        proc = subprocess.Popen(
+            argv,
+            cwd=BASE_DIR_STR,
+            stdout=log_fd,
+            stderr=subprocess.STDOUT,
+            env=CHILD_ENV,
+            start_new_session=True,  # own process group, so /stop can signal the whole tree
+        )
+    finally:
+        os.close(log_fd)
 
-    # Track this process (store file handle to keep it open)
-    run_id = f"{bank}_{ts}"
-    _active_processes[run_id] = {
-        "bank": bank,
-        "pid": proc.pid,
-        "log_file": str(log_file),
-        "log_file_handle": log_file_handle,  # Keep reference so file stays open
-        "started_at": ts,
-        "process": proc,  # Keep process reference
-    }
+    # Track this process
+    with _processes_lock:
+        _active_processes[run_id] = RunInfo(
+            bank=bank,
+            pid=proc.pid,
+            log_file=str(log_file),
+            started_at=ts,
+            process=proc,  # Keep process reference
+        )
+        _pid_to_runid[proc.pid] = run_id
+    start_reaper(run_id, proc)
+    return run_id, proc, log_file
+
+
+@app.post("/scrape-apf/{bank}")
+def start_scrape(bank: Literal["axis","canara","federal","hsbc","icici_hfc","ucorealty"]):
+    argv = SCRIPT_ARGV.get(bank)
+    if not argv:
+        raise HTTPException(status_code=404, detail=f"Unknown or missing scraper for bank '{bank}'")
+
+    run_id, proc, log_file = launch_scraper(bank, argv)
 
     return {
         "message": f"Started APF scraper for '{bank}'",
@@ -173,54 +161,36 @@ def start_scrape(bank: Literal["axis","canara","federal","hsbc","icici_hfc","uco
 
 
 @app.get("/scripts")
-def list_scripts():
+async def list_scripts():
     return {"banks": sorted(BANK_TO_SCRIPT.keys())}
 
 
+@app.post("/reload-scripts")
+def reload_scripts():
+    """Re-check which scraper scripts exist (e.g. after one is deployed without a restart)"""
+    global SCRIPT_PATHS, SCRIPT_ARGV
+    SCRIPT_PATHS = _existing_scripts(SCRIPT_FILES)
+    SCRIPT_ARGV = {name: (sys.executable, str(path)) for name, path in SCRIPT_PATHS.items()}
+    return {"available": sorted(SCRIPT_PATHS.keys())}
+
+
 @app.post("/scrape-99acres")
 def start_99acres_scraper():
     """Start the 99acres property scraper"""
-    script_name = "acres99_property_scraper.py"
-    script_path = BASE_DIR / script_name
-    
-    if not script_path.exists():
-        raise HTTPException(status_code=404, detail=f"Scraper file '{script_name}' not found")
-    
-    # Clean up finished processes
-    cleanup_finished_processes()
-    
-    # Per-run log file with timestamp to ensure uniqueness
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = OUT_DIR / f"run_99acres_{ts}.log"
-    
-    # Open log file in unbuffered mode for real-time logging
-    log_file_handle = log_file.open("w", encoding="utf-8", newline="", buffering=1)
+    argv = SCRIPT_ARGV.get("99acres")
+    if not argv:
+        raise HTTPException(status_code=404, detail="Scraper file 'acres99_property_scraper.py' not found")
     
-    # Launch the scraper as a background subprocess to avoid blocking the API worker
-    # Use -u flag for unbuffered Python output + PYTHONUNBUFFERED for real-time logs
-    env = os.environ.copy()
-    env["PYTHONUNBUFFERED"] = "1"
-    
-    proc = subprocess.Popen(
-        [sys.executable, "-u", str(script_path)],  # -u flag = unbuffered stdout/stderr
-        cwd=str(BASE_DIR),
-        stdout=log_file_handle,
-        stderr=subprocess.STDOUT,
-        bufsize=1,  # Line buffered for real-time output
-        universal_newlines=True,
-        env=env,
-    )
-    
-    # Track this process
-    run_id = f"99acres_{ts}"
-    _active_processes[run_id] = {
-        "bank": "99acres",  # Using "bank" field for consistency, but it's actually a property scraper
-        "pid": proc.pid,
-        "log_file": str(log_file),
-        "log_file_handle": log_file_handle,
-        "started_at": ts,
-        "process": proc,
-    }
+    # Its Chrome workers reuse fixed profile dirs (and share one CSV), so a second
+    # concurrent run's browsers would fail on Chrome's profile lock
+    with _acres99_start_lock:
+        with _processes_lock:
+            running = [rid for rid, info in _active_processes.items()
+                       if info.bank == "99acres" and info.process.poll() is None]
+        if running:
+            raise HTTPException(status_code=409, detail=f"99acres scraper is already running (run_id: {running[0]})")
+        # Using "bank" field for consistency, but it's actually a property scraper
+        run_id, proc, log_file = launch_scraper("99acres", argv)
     
     return {
         "message": "Started 99acres property scraper",
@@ -234,22 +204,19 @@ def start_99acres_scraper():
 @app.delete("/stop/{pid_or_run_id}")
 def stop_scraper(pid_or_run_id: str):
     """Stop a running scraper by PID or run_id"""
-    cleanup_finished_processes()
-    
-    # Try to find by run_id first
-    info = _active_processes.get(pid_or_run_id)
-    
-    # If not found by run_id, try to find by PID
-    if not info:
-        try:
-            pid = int(pid_or_run_id)
-            for run_id, proc_info in _active_processes.items():
-                if proc_info.get("pid") == pid:
-                    info = proc_info
+    with _processes_lock:
+        # Try to find by run_id first
+        info = _active_processes.get(pid_or_run_id)
+        
+        # If not found by run_id, try to find by PID
+        if not info:
+            try:
+                run_id = _pid_to_runid.get(int(pid_or_run_id))
+                if run_id:
+                    info = _active_processes.get(run_id)
                     pid_or_run_id = run_id  # Update to use run_id for cleanup
-                    break
-        except ValueError:
-            pass  # Not a valid PID
+            except ValueError:
+                pass  # Not a valid PID
     
     if not info:
         raise HTTPException(
@@ -257,84 +224,48 @@ def stop_scraper(pid_or_run_id: str):
             detail=f"Process with PID or run_id '{pid_or_run_id}' not found or not running"
         )
     
-    proc = info.get("process")
-    pid = info.get("pid")
+    proc = info.process
+    pid = info.pid
     run_id = pid_or_run_id
-    bank = info.get("bank", "unknown")
+    bank = info.bank
     
     killed = False
     error_message = None
     
-    # Method 1: Try to terminate via subprocess.Popen object
-    if proc is not None:
-        try:
-            if proc.poll() is None:  # Process is still running
-                proc.terminate()
+    # Each scraper leads its own process group (start_new_session=True), so one
+    # signal reaches it and everything it spawned (pool workers, chromedriver, Chrome)
+    try:
+        if proc.poll() is None:  # Process is still running
+            os.killpg(pid, signal.SIGTERM)
+            try:
+                proc.wait(timeout=STOP_GRACE_SECONDS.get(bank, DEFAULT_STOP_GRACE_SECONDS))
+                killed = True
+            except subprocess.TimeoutExpired:
+                # Process didn't terminate gracefully, force kill the whole group
+                os.killpg(pid, signal.SIGKILL)
                 try:
-                    proc.wait(timeout=5)
+                    proc.wait(timeout=2)
                     killed = True
                 except subprocess.TimeoutExpired:
-                    # Process didn't terminate gracefully, force kill
-                    proc.kill()
-                    try:
-                        proc.wait(timeout=2)
-                        killed = True
-                    except subprocess.TimeoutExpired:
-                        error_message = "Process did not terminate after kill signal"
-        except Exception as e:
-            error_message = f"Error terminating process: {str(e)}"
-    
-    # Method 2: Fallback to psutil to kill process and children
-    if not killed:
-        try:
-            process = psutil.Process(pid)
-            # Kill all child processes first (like Chrome driver)
-            try:
-                children = process.children(recursive=True)
-                for child in children:
-                    try:
-                        child.terminate()
-                    except psutil.NoSuchProcess:
-                        pass
-                
-                # Wait a bit for children to terminate
-                time.sleep(1)
-                
-                # Force kill any remaining children
-                for child in process.children(recursive=True):
-                    try:
-                        child.kill()
-                    except psutil.NoSuchProcess:
-                        pass
-            except psutil.NoSuchProcess:
-                pass
+                    error_message = "Process did not terminate after kill signal"
             
-            # Now kill the main process
-            try:
-                process.terminate()
-                try:
-                    process.wait(timeout=5)
-                    killed = True
-                except psutil.TimeoutExpired:
-                    process.kill()
-                    process.wait(timeout=2)
-                    killed = True
-            except psutil.NoSuchProcess:
-                killed = True  # Already dead
-        except psutil.NoSuchProcess:
-            killed = True  # Process already finished
-        except Exception as e:
-            error_message = f"Error killing process: {str(e)}"
+            # Sweep anything left in the group now the scraper itself is gone. Only right
+            # after our own signal: a group id isn't reused while members remain, but once
+            # the group is long empty the number could belong to an unrelated process
+            if killed:
+                os.killpg(pid, signal.SIGKILL)
+        else:
+            killed = True  # Already finished
+    except ProcessLookupError:
+        killed = True  # Nothing left in the group
+    except Exception as e:
+        error_message = f"Error terminating process: {str(e)}"
     
-    # Clean up tracking
-    if run_id in _active_processes:
-        info = _active_processes.pop(run_id)
-        # Close log file handle
-        if "log_file_handle" in info:
-            try:
-                info["log_file_handle"].close()
-            except Exception:
-                pass
+    # Clean up tracking (the reaper thread does the same once the process is gone)
+    with _processes_lock:
+        _active_processes.pop(run_id, None)
+        if _pid_to_runid.get(pid) == run_id:
+            del _pid_to_runid[pid]
     
     if killed:
         return {
@@ -354,54 +285,33 @@ def stop_scraper(pid_or_run_id: str):
 
 
 @app.get("/status")
-def get_status():
+async def get_status():
     """Get status of active scraper runs"""
-    cleanup_finished_processes()
+    # Only a short lock and dict reads, so this runs on the event loop without a threadpool hop
+    # Finished runs are removed by their reaper thread, so every entry here is live
+    # (returncode is only set in the brief window before the reaper runs)
+    with _processes_lock:
+        runs = list(_active_processes.items())
     
     processes_info = []
-    for run_id, info in _active_processes.items():
-        proc = info.get("process")
-        pid = info.get("pid")
-        status_detail = "unknown"
-        returncode = None
-        
-        # Check process status
-        if proc is not None:
-            returncode = proc.poll()
-            if returncode is None:
-                status_detail = "running"
-            else:
-                status_detail = f"finished (exit code: {returncode})"
-        else:
-            # Fallback to psutil if proc object not available
-            try:
-                process = psutil.Process(pid)
-                status = process.status()
-                if status == psutil.STATUS_ZOMBIE:
-                    status_detail = "zombie (finished)"
-                elif status == psutil.STATUS_DEAD:
-                    status_detail = "dead (finished)"
-                elif process.is_running():
-                    status_detail = "running"
-                else:
-                    status_detail = "finished"
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                status_detail = "not found (finished)"
-            except Exception:
-                status_detail = "unknown"
+    for run_id, info in runs:
+        proc = info.process
+        pid = info.pid
+        returncode = proc.returncode
+        status_detail = "running" if returncode is None else f"finished (exit code: {returncode})"
         
         processes_info.append({
             "run_id": run_id,
-            "bank": info["bank"],
+            "bank": info.bank,
             "pid": pid,
-            "log_file": info["log_file"],
-            "started_at": info["started_at"],
+            "log_file": info.log_file,
+            "started_at": info.started_at,
             "status": status_detail,
             "returncode": returncode,
         })
     
     return {
-        "active_runs": len(_active_processes),
+        "active_runs": len(runs),
         "processes": processes_info
     }
 
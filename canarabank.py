@@ -2,40 +2,213 @@ from selenium import webdriver
 from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+import csv
+from io import BytesIO
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import lxml.html
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 from datetime import datetime, timezone
-from collections import defaultdict
-import boto3
-import json
+import orjson
 from pathlib import Path
 from dotenv import load_dotenv
+from s3_utils import ORJSON_OPTIONS, S3_TRANSFER_CONFIG, get_s3_client
+
+URL = "https://canarabank.com/housingprojects"
+CSV_FIELDNAMES = ["City", "Project Name", "Builder Name"]
+# Concurrent city requests on the HTTP path (kept low to be polite to the bank's server)
+HTTP_WORKERS = 8
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
 def initialize_driver():
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1920,1080")
+    # Only the results table is read, so skip images and web fonts
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "webkit.webprefs.remote_fonts_enabled": False,
+    })
+    # Return at DOMContentLoaded; every step after a load waits for its element anyway
+    options.page_load_strategy = "eager"
     return webdriver.Chrome(options=options)
 
 def wait_for_table(driver, timeout=10):
     WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((By.ID, "tbllogdata"))
     )
-    time.sleep(2)
+    # Rows can land just after the table itself; wait for a data row instead of a fixed
+    # sleep, but cities without projects only ever show the header, so give up quietly
+    try:
+        WebDriverWait(driver, 2, poll_frequency=0.1).until(
+            lambda d: len(d.find_elements(By.CSS_SELECTOR, "#tbllogdata tr")) > 1
+        )
+    except TimeoutException:
+        pass
+
+# Row count and first data row text of the results table (None when it isn't on the page)
+TABLE_FINGERPRINT_JS = """
+const t = document.getElementById('tbllogdata');
+if (!t) return null;
+return [t.rows.length, t.rows.length > 1 ? t.rows[1].textContent : ''];
+"""
+
+def wait_for_new_results(driver, before, old_table, timeout=10):
+    """Wait until a submit has replaced the results table or changed what it shows.
+
+    The table may be swapped out by a page load or refilled in place by JS, so
+    either counts. Two cities in a row without projects look the same (header
+    only); in that case the unchanged table is accepted once the wait runs out.
+    """
+    def changed(d):
+        if old_table is not None:
+            try:
+                old_table.is_enabled()
+            except StaleElementReferenceException:
+                return True
+        now = d.execute_script(TABLE_FINGERPRINT_JS)
+        return now is not None and now != before
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(changed)
+    except TimeoutException:
+        if before is None or before[0] > 1:
+            raise
 
 def is_valid_data_row(columns):
     return len(columns) >= 4 and all(col.text.strip() for col in columns[1:4])
 
-def scrape_canara_apf():
-    print(" Starting Canara Bank APF scraper...")
-    url = "https://canarabank.com/housingprojects"
-    driver = initialize_driver()
-    driver.get(url)
+def row_to_record(texts):
+    return {
+        "City": texts[1],
+        "Project Name": texts[2],
+        "Builder Name": texts[3]
+    }
+
+def new_http_session():
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    # Retry transient server errors (the form POST included) with backoff
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504], allowed_methods=None)
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+def load_city_form(session):
+    """Fetch the page once and return (action, method, fields, city field name, [(value, name), ...])"""
+    resp = session.get(URL, timeout=30)
+    resp.raise_for_status()
+    tree = lxml.html.fromstring(resp.content, base_url=resp.url)
+
+    city_select = tree.get_element_by_id("CityName")
+    form = next(city_select.iterancestors("form"))
+    city_field = city_select.get("name") or "CityName"
+
+    # Hidden inputs (anti-forgery tokens etc.) go back with every POST
+    fields = [(k, v) for k, v in form.form_values() if k != city_field]
+    submit_btn = tree.get_element_by_id("BtnSubmit", None)
+    if submit_btn is not None and submit_btn.get("name"):
+        fields.append((submit_btn.get("name"), submit_btn.get("value", "")))
+
+    # Option 0 is the placeholder, same as the dropdown walk in the browser path
+    options = [(opt.get("value", opt.text_content().strip()), opt.text_content().strip())
+               for opt in city_select.xpath("./option")]
+    return form.action or resp.url, (form.method or "GET").upper(), fields, city_field, options
+
+def fetch_city_rows_http(session, action, method, fields, city_field, city_value):
+    """Submit the form for one city; return its rows, or None if the response has no results table"""
+    data = fields + [(city_field, city_value)]
+    if method == "POST":
+        resp = session.post(action, data=data, timeout=30)
+    else:
+        resp = session.get(action, params=data, timeout=30)
+    resp.raise_for_status()
+
+    tables = lxml.html.fromstring(resp.content).xpath('//table[@id="tbllogdata"]')
+    if not tables:
+        return None
+
+    city_data = []
+    for row in tables[0].xpath(".//tr")[1:]:  # skip header
+        # Same whitespace handling as Selenium's rendered .text
+        texts = [" ".join(td.text_content().split()) for td in row.xpath("./td")]
+        if len(texts) >= 4 and all(texts[1:4]):
+            city_data.append(row_to_record(texts))
+    return city_data
+
+def scrape_city_http(session, form, option):
+    """Scrape one city; returns its rows ([] on any error) or None if there's no results table"""
+    city_value, city_name = option
+    print(f"\n Scraping city: {city_name}")
+    try:
+        return fetch_city_rows_http(session, *form, city_value)
+    except Exception as e:
+        # Request errors and responses lxml can't parse alike: skip the city, don't end the run
+        print(f" Error in {city_name}: {e}")
+        return []
 
-    all_data_rows = []
+def scrape_cities_http(save_rows):
+    """Scrape every city by replaying the form submit without a browser.
+
+    Returns False (before any rows are saved) if the page can't be driven
+    this way, so the caller falls back to Selenium.
+    """
+    session = new_http_session()
+    try:
+        action, method, fields, city_field, options = load_city_form(session)
+    except Exception as e:
+        print(f" Could not read the city form over HTTP ({e}), falling back to the browser")
+        return False
+    print(f"Found {len(options)} cities in dropdown")
+    form = (action, method, fields, city_field)
+
+    # One city at a time until a response shows the table comes back with the form submit
+    index = 1
+    seen_table = False
+    while not seen_table and index < len(options):
+        city_data = scrape_city_http(session, form, options[index])
+        index += 1
+        if city_data is None:
+            # The table is filled in by page JS rather than the form response
+            print(" Results table not in the form response, falling back to the browser")
+            return False
+        seen_table = bool(city_data) or seen_table
+        save_rows(city_data)
+
+    if not seen_table:
+        # Every probe failed or came back empty, so nothing was saved yet
+        print(" No city returned rows over HTTP, falling back to the browser")
+        return False
+
+    # The remaining cities are independent submits, so run a bounded number at once;
+    # each thread gets its own session carrying the page's cookies
+    local = threading.local()
+
+    def worker(option):
+        if not hasattr(local, "session"):
+            local.session = new_http_session()
+            local.session.cookies.update(session.cookies)
+        return scrape_city_http(local.session, form, option)
+
+    with ThreadPoolExecutor(max_workers=HTTP_WORKERS) as pool:
+        for option, city_data in zip(options[index:], pool.map(worker, options[index:])):
+            if city_data is None:
+                print(f" No results table for {option[1]}")
+                continue
+            save_rows(city_data)
+
+    return True
+
+def scrape_cities_selenium(save_rows):
+    driver = initialize_driver()
+    driver.get(URL)
 
     try:
         city_dropdown = Select(WebDriverWait(driver, 10).until(
@@ -44,14 +217,21 @@ def scrape_canara_apf():
         total_cities = len(city_dropdown.options)
         print(f"Found {total_cities} cities in dropdown")
 
+        # The form stays on the page after a submit, so the next city is picked from
+        # there; a full reload is only the recovery path after a failed attempt
+        reload_page = False
+
         for index in range(1, total_cities):
             retry_count = 0
             max_retries = 5
             success = False
+            city_name = f"city index {index}"
 
             while retry_count < max_retries and not success:
                 try:
-                    driver.get(url)
+                    if reload_page:
+                        driver.get(URL)
+                        reload_page = False
                     WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "CityName")))
                     city_dropdown = Select(driver.find_element(By.ID, "CityName"))
 
@@ -61,11 +241,16 @@ def scrape_canara_apf():
 
                     city_dropdown.select_by_index(index)
 
+                    # The previous city's table is still showing; wait for it to be replaced
+                    # or refilled before reading
+                    old_table = driver.find_elements(By.ID, "tbllogdata")
+                    before = driver.execute_script(TABLE_FINGERPRINT_JS)
+
                     submit_btn = driver.find_element(By.ID, "BtnSubmit")
-                    driver.execute_script("arguments[0].scrollIntoView(true);", submit_btn)
-                    time.sleep(0.5)
+                    # A JS click needs neither scrolling nor a settle delay
                     driver.execute_script("arguments[0].click();", submit_btn)
 
+                    wait_for_new_results(driver, before, old_table[0] if old_table else None)
                     wait_for_table(driver)
 
                     table = driver.find_element(By.ID, "tbllogdata")
@@ -76,27 +261,19 @@ def scrape_canara_apf():
                     for row in rows[1:]:  # skip header
                         cols = row.find_elements(By.TAG_NAME, "td")
                         if is_valid_data_row(cols):
-                            city_data.append({
-                                "City": cols[1].text.strip(),
-                                "Project Name": cols[2].text.strip(),
-                                "Builder Name": cols[3].text.strip()
-                            })
-
-                    if city_data:
-                        df = pd.DataFrame(city_data)
-                        OUT_DIR = Path("output"); OUT_DIR.mkdir(exist_ok=True)
-                        CSV_PATH = OUT_DIR / "canara_apf_data.csv"
-                        write_header = not CSV_PATH.exists()
-                        df.to_csv(CSV_PATH, index=False, mode='a', header=write_header)
-                        all_data_rows.extend(city_data)
+                            city_data.append(row_to_record([col.text.strip() for col in cols]))
+
+                    save_rows(city_data)
 
                     success = True
-                except StaleElementReferenceException:
+                except (StaleElementReferenceException, TimeoutException):
                     retry_count += 1
+                    reload_page = True
                     print(f" Retry {retry_count}/{max_retries} for {city_name}")
                     time.sleep(2)
                 except Exception as e:
                     print(f" Error in {city_name}: {e}")
+                    reload_page = True
                     break
 
             if not success:
@@ -104,9 +281,32 @@ def scrape_canara_apf():
 
     finally:
         driver.quit()
-        print(" Scraping completed.")
 
-    return all_data_rows
+def scrape_canara_apf():
+    print(" Starting Canara Bank APF scraper...")
+    OUT_DIR = Path("output"); OUT_DIR.mkdir(exist_ok=True)
+    CSV_PATH = OUT_DIR / "canara_apf_data.csv"
+    rows_written = 0
+
+    # Stream each city's rows into one CSV opened for the whole run
+    with open(CSV_PATH, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+
+        def save_rows(rows):
+            nonlocal rows_written
+            writer.writerows(rows)
+            rows_written += len(rows)
+
+        try:
+            # The results table is server-rendered from the city form, so plain HTTP
+            # avoids a Chrome launch and a full page load per city; the browser is the fallback
+            if not scrape_cities_http(save_rows):
+                scrape_cities_selenium(save_rows)
+        finally:
+            print(f" Scraping completed. {rows_written} rows saved to {CSV_PATH}")
+
+    return rows_written
 
 def data_processing():
     try:
@@ -115,14 +315,12 @@ def data_processing():
         CSV_PATH = OUT_DIR / "canara_apf_data.csv"
         df = pd.read_csv(CSV_PATH, names=columns, header=0)
 
-        # group by city
-        grouped_data = defaultdict(list)
-        for _, row in df.iterrows():
-            city = row.get("city", "Unknown")
-            grouped_data[city].append({
-                "builderName": row.get("builderName", "Unknown"),
-                "projectName": row.get("projectName", "Unknown")
-            })
+        # group by city (first-seen order, as the rows were scraped)
+        grouped_data = (
+            df.groupby("city", sort=False)[["builderName", "projectName"]]
+            .apply(lambda g: g.to_dict("records"))
+            .to_dict()
+        )
         
         # upload to s3
         # ensure .env variables are loaded
@@ -135,12 +333,13 @@ def data_processing():
         if not s3_key_prefix:
             raise ValueError("S3_KEY is not set. Please set it in environment or .env")
         s3_key = f"{s3_key_prefix.rstrip('/')}/canarabank_data_{timestamp}.json"
-        s3 = boto3.client("s3")
-        s3.put_object(
-            Bucket=bucket,
-            Key=s3_key,
-            Body=json.dumps(grouped_data, indent=4).encode("utf-8"),
-            ContentType="application/json"
+        s3 = get_s3_client()
+        s3.upload_fileobj(
+            BytesIO(orjson.dumps(grouped_data, option=ORJSON_OPTIONS)),
+            bucket,
+            s3_key,
+            ExtraArgs={"ContentType": "application/json"},
+            Config=S3_TRANSFER_CONFIG,
         )
 
         print(f"Data uploaded to S3: {s3_key}")
@@ -149,7 +348,7 @@ def data_processing():
 
 if __name__ == "__main__":
     print("Starting Canara Bank APF scraper...")
-    scraped_data = scrape_canara_apf()
+    scrape_canara_apf()
 
     # ask for confirmation
     # confirm = input("Do you want to upload the data to S3? (y/n): ")
@@ -1,90 +1,116 @@
 import re
-import unicodedata
 from html import unescape
 import pandas as pd
 from pathlib import Path
 import os
 import json
-import boto3
+import orjson
 from datetime import datetime, timezone
 from dotenv import load_dotenv
+from s3_utils import ORJSON_OPTIONS, S3_TRANSFER_CONFIG, get_s3_client
 import requests
 import time
 from io import BytesIO
 
 EXCEL_URL = "https://www.federalbank.co.in/documents/10180/8267740/Housing%2BProjects%2BFinanced.xlsx/363365c1-bc84-47ec-acc1-315d1a4e93a5?t=1479363143811"
 
+# Last downloaded workbook and its ETag/Last-Modified, so an unchanged file isn't re-downloaded
+EXCEL_CACHE_PATH = Path("output") / "federalbank_apf.xlsx"
+EXCEL_META_PATH = Path("output") / "federalbank_apf.xlsx.json"
+
 # --- normalizers -------------------------------------------------------------
 
-ZW_REGEX = re.compile(r"[\u200B-\u200D\u2060\uFEFF]")  # zero-width chars
-NBSP_REGEXES = [
-    (re.compile(r"&nbsp;?", flags=re.IGNORECASE), " "),
-    (re.compile(r"\u00A0"), " "),                     # Unicode NBSP
-    (re.compile(r"\bNBSP\b", flags=re.IGNORECASE), " "),
-]
+# Textual NBSP variants (the Unicode NBSP char is handled by CHAR_TABLE). A bare
+# "NBSP" right after "&nbsp" counts as its own word, as if the entity were already a space
+NBSP_TEXT_REGEX = re.compile(r"(?:&nbsp;?)+(?:NBSP\b)?|\bNBSP\b", flags=re.IGNORECASE)
 
-QUOTE_TABLE = str.maketrans({
+# Every char-level fix in one translate pass: Unicode NBSP -> space,
+# zero-width chars removed, curly quotes/backticks -> plain quotes
+CHAR_TABLE = str.maketrans({
+    "\u00A0": " ",
+    "\u200B": None, "\u200C": None, "\u200D": None, "\u2060": None, "\uFEFF": None,
     "“": '"', "”": '"', "„": '"', "‟": '"',
     "‘": "'", "’": "'", "‚": "'", "‛": "'",
     "`": "'", "´": "'",
 })
 
-def clean_generic(text: str) -> str:
-    """Clean general text fields (builder/project). Preserve case."""
-    if pd.isna(text):
-        return ""
-    s = str(text)
+# Runs of quotes collapse to one quote, runs of whitespace to one space
+COLLAPSE_REGEX = re.compile(r'"+|\'+|\s+')
 
-    # HTML decode then Unicode normalize
-    s = unescape(s)
-    s = unicodedata.normalize("NFKC", s)
+def _collapse(m: re.Match) -> str:
+    ch = m.group(0)[0]
+    return ch if ch in "\"'" else " "
+
+def clean_generic(col: pd.Series) -> pd.Series:
+    """Clean a column of general text fields (builder/project). Preserve case."""
+    s = col.fillna("").astype(str)
 
-    # Replace NBSP variants and remove zero-width chars
-    for rx, rep in NBSP_REGEXES:
-        s = rx.sub(rep, s)
-    s = ZW_REGEX.sub("", s)
+    # HTML decode then Unicode normalize
+    s = s.map(unescape)
+    s = s.str.normalize("NFKC")
 
-    # Normalize quotes/backticks
-    s = s.translate(QUOTE_TABLE)
+    # Replace NBSP variants, remove zero-width chars, normalize quotes/backticks
+    s = s.str.replace(NBSP_TEXT_REGEX, " ", regex=True)
+    s = s.str.translate(CHAR_TABLE)
 
     # Remove stray outer quotes/backticks
-    s = s.strip().strip('"').strip("'")
-
-    # Collapse repeated quotes inside like ""Shree""
-    s = re.sub(r'"+', '"', s)
-    s = re.sub(r"'+", "'", s)
+    s = s.str.strip().str.strip('"').str.strip("'")
 
-    # Collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
+    # Collapse repeated quotes inside like ""Shree"" and whitespace, in one pass
+    s = s.str.replace(COLLAPSE_REGEX, _collapse, regex=True).str.strip()
     return s
 
-def extract_city_phrase(location: str) -> str:
-    """Return FULL phrase after the last comma; tidy & title-case."""
-    if pd.isna(location):
-        return ""
+def extract_city_phrase(location: pd.Series) -> pd.Series:
+    """Return FULL phrase after the last comma for each location; tidy & title-case."""
     s = clean_generic(location)
 
     # After last comma (if any), else whole string
-    part = s.rsplit(",", 1)[-1] if "," in s else s
+    part = s.str.rsplit(",", n=1).str[-1]
 
     # Drop any parenthetical notes
-    part = re.sub(r"\([^)]*\)", " ", part)
+    part = part.str.replace(r"\([^)]*\)", " ", regex=True)
 
     # Keep letters, spaces, and hyphens, then collapse spaces
-    part = re.sub(r"[^A-Za-z\s-]", " ", part)
-    part = re.sub(r"\s+", " ", part).strip()
+    part = part.str.replace(r"[^A-Za-z\s-]", " ", regex=True)
+    part = part.str.replace(r"\s+", " ", regex=True).str.strip()
 
     # Title case for city/state names (keeps multi-word e.g., "Tamil Nadu")
-    return part.title()
+    return part.str.title()
 
 # --- pipeline ----------------------------------------------------------------
 
+def load_excel_validators() -> dict:
+    """Return the cached ETag/Last-Modified of the last download, if the file is still there"""
+    if not (EXCEL_CACHE_PATH.exists() and EXCEL_META_PATH.exists()):
+        return {}
+    try:
+        return json.loads(EXCEL_META_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
 def fetch_excel_with_retries(url: str, attempts: int = 5, timeout: int = 30) -> BytesIO:
+    # Conditional GET: the server answers 304 (no body) when the workbook hasn't changed
+    validators = load_excel_validators()
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
     last_err = None
     for i in range(1, attempts + 1):
         try:
-            resp = requests.get(url, timeout=timeout, allow_redirects=True)
+            resp = requests.get(url, timeout=timeout, allow_redirects=True, headers=headers)
+            if resp.status_code == 304 and headers:
+                print("Excel unchanged since last download, using cached copy")
+                return BytesIO(EXCEL_CACHE_PATH.read_bytes())
             if 200 <= resp.status_code < 300 and resp.content:
+                EXCEL_CACHE_PATH.parent.mkdir(exist_ok=True)
+                EXCEL_CACHE_PATH.write_bytes(resp.content)
+                EXCEL_META_PATH.write_text(json.dumps({
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                }), encoding="utf-8")
                 return BytesIO(resp.content)
             last_err = RuntimeError(f"HTTP {resp.status_code}")
         except Exception as e:
@@ -94,28 +120,31 @@ def fetch_excel_with_retries(url: str, attempts: int = 5, timeout: int = 30) ->
         time.sleep(sleep_s)
     raise last_err or RuntimeError("Failed to download Excel file")
 
-# Read workbook (row 2 has real headers, header=1) with retries to avoid HTTP 5xx
-excel_bytes = fetch_excel_with_retries(EXCEL_URL)
-df = pd.read_excel(excel_bytes, header=1, engine="openpyxl")
+def build_apf_csv():
+    # Read workbook (row 2 has real headers, header=1) with retries to avoid HTTP 5xx
+    excel_bytes = fetch_excel_with_retries(EXCEL_URL)
+    # calamine (Rust) parses the workbook several times faster than openpyxl
+    df = pd.read_excel(excel_bytes, header=1, engine="calamine")
 
-# Keep needed columns, clean, and build city
-df = df[["Name of the Builder/Developer", "Project Name", "Location"]].dropna(how="all")
+    # Keep needed columns, clean, and build city
+    df = df[["Name of the Builder/Developer", "Project Name", "Location"]].dropna(how="all")
 
-df["builder"] = df["Name of the Builder/Developer"].apply(clean_generic)
-df["project"] = df["Project Name"].apply(clean_generic)
-df["city"] = df["Location"].apply(extract_city_phrase)
+    # Whole-column string ops instead of a Python call per cell
+    df["builder"] = clean_generic(df["Name of the Builder/Developer"])
+    df["project"] = clean_generic(df["Project Name"])
+    df["city"] = extract_city_phrase(df["Location"])
 
-# Final order (no raw Location in output)
-out_df = df[["city", "builder", "project"]]
+    # Final order (no raw Location in output)
+    out_df = df[["city", "builder", "project"]]
 
-# Drop rows where city ended up empty after cleaning
-out_df = out_df[out_df["city"].astype(bool)]
+    # Drop rows where city ended up empty after cleaning
+    out_df = out_df[out_df["city"].astype(bool)]
 
-# Save
-OUT_DIR = Path("output"); OUT_DIR.mkdir(exist_ok=True)
-csv_path = OUT_DIR / "federalbank_apf_data.csv"
-out_df.to_csv(csv_path, index=False, encoding="utf-8")
-print(f"Saved {len(out_df)} rows to {csv_path}")
+    # Save
+    OUT_DIR = Path("output"); OUT_DIR.mkdir(exist_ok=True)
+    csv_path = OUT_DIR / "federalbank_apf_data.csv"
+    out_df.to_csv(csv_path, index=False, encoding="utf-8")
+    print(f"Saved {len(out_df)} rows to {csv_path}")
 
 
 def data_processing():
@@ -126,15 +155,17 @@ def data_processing():
         columns = ["city", "builder", "project"]
         df = pd.read_csv(CSV_PATH, names=columns, header=0)
 
-        grouped_data = {}
-        for _, row in df.iterrows():
-            city = row.get("city", "Unknown")
-            builder_name = row.get("builder", "Unknown")
-            project_name = row.get("project", "Unknown")
-            grouped_data.setdefault(city, []).append({
-                "builderName": builder_name,
-                "projectName": project_name
-            })
+        # The sheet repeats some projects; drop exact repeats (and cityless rows)
+        # so they aren't grouped and uploaded twice
+        df = df.drop_duplicates(subset=columns).dropna(subset=["city"])
+
+        # group by city (first-seen order, as in the sheet)
+        grouped_data = (
+            df.rename(columns={"builder": "builderName", "project": "projectName"})
+            .groupby("city", sort=False)[["builderName", "projectName"]]
+            .apply(lambda g: g.to_dict("records"))
+            .to_dict()
+        )
 
         # load env and validate
         load_dotenv()
@@ -148,12 +179,13 @@ def data_processing():
         timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
         s3_key = f"{key_prefix.rstrip('/')}/federalbank_data_{timestamp}.json"
 
-        s3 = boto3.client("s3")
-        s3.put_object(
-            Bucket=bucket,
-            Key=s3_key,
-            Body=json.dumps(grouped_data, indent=4).encode("utf-8"),
-            ContentType="application/json"
+        s3 = get_s3_client()
+        s3.upload_fileobj(
+            BytesIO(orjson.dumps(grouped_data, option=ORJSON_OPTIONS)),
+            bucket,
+            s3_key,
+            ExtraArgs={"ContentType": "application/json"},
+            Config=S3_TRANSFER_CONFIG,
         )
 
         print(f"Data uploaded to S3: {s3_key}")
@@ -161,5 +193,8 @@ def data_processing():
         print(f"Error: {str(e)}")
 
 
-# process and upload
-data_processing()
+if __name__ == "__main__":
+    # download, clean, then process and upload
+    build_apf_csv()
+    data_processing()
+
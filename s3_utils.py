@@ -0,0 +1,19 @@
+import boto3
+import orjson
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+# Created on first use (after the scraper's load_dotenv) and reused for every upload in this process
+_s3_client = None
+# Multipart (in parallel threads) only kicks in for bodies over 8MB
+S3_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, use_threads=True)
+# JSON uploads are pretty-printed (orjson only does 2-space indents). The grouped
+# rows come from DataFrame.to_dict(), which already yields plain str keys and Python scalars
+ORJSON_OPTIONS = orjson.OPT_INDENT_2
+
+def get_s3_client():
+    """Return the shared boto3 S3 client (retries and TCP keepalive on), creating it on first use"""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client("s3", config=Config(retries={"max_attempts": 3, "mode": "standard"}, tcp_keepalive=True))
+    return _s3_client
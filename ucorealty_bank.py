@@ -1,9 +1,13 @@
 # scrape_ucorealty_all_states_final_fixed.py
+import asyncio
 import csv
+import io
 import re
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Union, List, Tuple, Set
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout, Page, Frame
+from playwright.async_api import async_playwright, Error as PWError, TimeoutError as PWTimeout, Page, Frame, Browser
 import os
 import json
 import boto3
@@ -13,6 +17,9 @@ from dotenv import load_dotenv
 BASE = "https://ucorealty.uco.bank.in/Project-List.aspx"
 OUT_DIR = Path("output"); OUT_DIR.mkdir(exist_ok=True)
 CSV_PATH = OUT_DIR / "ucorealty_apf_data.csv"
+# State dropdown options from the last run; reused while younger than a day
+STATES_CACHE_PATH = OUT_DIR / "ucorealty_states.json"
+STATES_CACHE_MAX_AGE_S = 24 * 3600
 
 # Selectors
 GRID      = "#ctl00_ContentPlaceHolder1_DgProject"
@@ -21,16 +28,20 @@ BTN       = "#ctl00_ContentPlaceHolder1_BtnSearch"
 LBL_EMPTY = "#ctl00_ContentPlaceHolder1_lblgrid"
 PANEL     = "#ctl00_ContentPlaceHolder1_UpdatePanel1"
 
-# Timings (tune if needed)
-WAIT_AFTER_SEARCH_MS      = 1400
-WAIT_AFTER_PAGER_MS       = 1400
-WAIT_BEFORE_CLICK_MS      = 200
-WAIT_AFTER_CLICK_MS       = 900
-WAIT_AFTER_MODAL_READY_MS = 250
+# Timings (tune if needed). These are upper bounds; every wait returns as soon as
+# the page is ready
+POPUP_APPEAR_TIMEOUT_MS   = 5000
+POPUP_POLL_MS             = 50
 EXPECT_POPUP_TIMEOUT_MS   = 4000
 MODAL_FIELD_TIMEOUT_MS    = 9000
 FINGERPRINT_TIMEOUT_MS    = 14000
 MAX_CLICK_RETRIES         = 3
+# Pause before retry n (exponential: quick when the link was just detached, long when stuck)
+RETRY_BACKOFF_MS          = [50, 150, 400, 1000, 2500]
+
+# States scraped at once, each in its own browser context (one shared browser).
+# The site is latency-bound, so waits in one state overlap with work in the others.
+STATE_WORKERS = 8
 
 FIELDNAMES = [
     "state",
@@ -41,91 +52,106 @@ FIELDNAMES = [
 PopupCtx = Union[Page, Frame]
 
 # ---------------- utils ----------------
+NON_DIGITS = re.compile(r"\D+")
+# "Next" pager link text
+PAGER_NEXT = re.compile(r"^\s*(Next|›|>)\s*$", re.I)
+
+@lru_cache(maxsize=128)
+def pager_label(text: str) -> re.Pattern:
+    """Exact-match pattern for one page number, compiled once per number."""
+    return re.compile(rf"^\s*{re.escape(text)}\s*$")
+
 def tidy(s: Optional[str]) -> str:
-    return " ".join((s or "").replace("\xa0", " ").split())
+    # str.split() already treats \xa0 as whitespace
+    return " ".join((s or "").split())
 
 def numtext(s: Optional[str]) -> str:
-    s = (s or "")
-    return "".join(ch for ch in s if ch.isdigit())
+    return NON_DIGITS.sub("", s or "")
+
+async def sleep(page: Page, ms: int):
+    await page.wait_for_timeout(ms)
+
+async def wait_postback_settled(page: Page, timeout=25000):
+    """Wait for an in-flight UpdatePanel (async) postback to finish; no-op otherwise."""
+    await page.wait_for_function(
+        """() => {
+            const prm = window.Sys?.WebForms?.PageRequestManager?.getInstance?.();
+            return !prm || !prm.get_isInAsyncPostBack();
+        }""",
+        timeout=timeout
+    )
 
-def sleep(page: Page, ms: int):
-    page.wait_for_timeout(ms)
+async def backoff(page: Page, attempt: int):
+    await sleep(page, RETRY_BACKOFF_MS[min(attempt - 1, len(RETRY_BACKOFF_MS) - 1)])
 
-def dismiss_overlays(page: Page):
+async def dismiss_overlays(page: Page):
     # Sidebar/overlay sometimes appears; dismiss gently.
     try:
-        page.mouse.click(5, 5)
-        page.keyboard.press("Escape")
+        await page.mouse.click(5, 5)
+        await page.keyboard.press("Escape")
     except Exception:
         pass
 
 # ---------------- state/options ----------------
-def get_state_options(page: Page) -> List[Tuple[str, str]]:
+async def get_state_options(page: Page) -> List[Tuple[str, str]]:
     # Wait for dropdown to be ready before fetching options
     try:
-        print("    [DEBUG] Waiting for dropdown selector...")
-        page.wait_for_selector(DDL, state="visible", timeout=30000)
-        print("    [DEBUG] Dropdown found, waiting for options to populate...")
-        sleep(page, 1000)  # Give dropdown time to populate (may be populated via JS)
+        await page.wait_for_selector(DDL, state="visible", timeout=30000)
+        # Options may be populated via JS; the placeholder alone doesn't count
+        await page.wait_for_function(
+            "sel => (document.querySelector(sel)?.options.length || 0) > 1",
+            arg=DDL, timeout=15000
+        )
     except PWTimeout:
-        print("    [!] Dropdown not found when fetching state options")
+        print("    [!] Dropdown not found or never populated when fetching state options")
         return []
-    
-    # Try to check if dropdown exists and has options
-    dropdown_exists = page.locator(DDL).count() > 0
-    print(f"    [DEBUG] Dropdown element exists: {dropdown_exists}")
-    
-    if not dropdown_exists:
-        print("    [!] Dropdown element not found in DOM")
-        return []
-    
-    opts = page.locator(f"{DDL} > option")
-    # Wait a bit more for options to be fully loaded
-    sleep(page, 500)
-    
+
+    # Every option's (text, value) in one evaluate
+    raw = await page.evaluate(
+        "sel => Array.from(document.querySelectorAll(sel + ' > option'), o => [o.textContent || '', o.getAttribute('value') || ''])",
+        DDL
+    )
+
     items = []
-    option_count = opts.count()
-    print(f"    [DEBUG] Found {option_count} dropdown options total")
-    
-    if option_count == 0:
-        print("    [!] No options found in dropdown - page may not have loaded correctly")
-        # Try waiting a bit more
-        sleep(page, 2000)
-        option_count = opts.count()
-        print(f"    [DEBUG] After additional wait: {option_count} options")
-    
-    for i in range(option_count):
-        o = opts.nth(i)
-        try:
-            label = tidy(o.text_content() or "")
-            val = (o.get_attribute("value") or "").strip()
-            print(f"    [DEBUG] Option {i}: label='{label}', value='{val}'")
-            if label and val and label.upper() != "SELECT STATE":
-                items.append((label, val))
-        except Exception as e:
-            print(f"    [!] Error reading option {i}: {e}")
-            continue
-    
-    print(f"    [DEBUG] Returning {len(items)} valid state options")
+    for label, val in raw:
+        label, val = tidy(label), val.strip()
+        if label and val and label.upper() != "SELECT STATE":
+            items.append((label, val))
+
     return items
 
-def wait_for_results_or_empty(page: Page, timeout=25000) -> str:
-    page.wait_for_function(f"""
-        () => {{
-          const g = document.querySelector('{GRID}');
-          const m = document.querySelector('{LBL_EMPTY}');
-          const mt = (m?.textContent||'').toLowerCase();
-          return (g && g.offsetParent !== null) || (mt.includes('no records found'));
-        }}
-    """, timeout=timeout)
-    if page.locator(GRID).is_visible(): return "grid"
-    if "no records found" in tidy(page.locator(LBL_EMPTY).inner_text()).lower(): return "empty"
-    return "unknown"
-
-def wait_grid_visible(page: Page, timeout=10000):
-    page.wait_for_selector(GRID, state="visible", timeout=timeout)
-
-def wait_rows_present(page: Page, timeout=14000):
+def load_cached_states() -> List[Tuple[str, str]]:
+    """State options saved by a recent run, or [] if there are none (or they are stale)."""
+    try:
+        if time.time() - STATES_CACHE_PATH.stat().st_mtime > STATES_CACHE_MAX_AGE_S:
+            return []
+        return [(label, val) for label, val in json.loads(STATES_CACHE_PATH.read_text(encoding="utf-8"))]
+    except (OSError, ValueError):
+        return []
+
+async def wait_for_results_or_empty(page: Page, timeout=25000) -> str:
+    """'grid' or 'empty', whichever shows up first; raises PWTimeout if neither does."""
+    # Two event-driven selector waits raced against each other, instead of polling a JS predicate
+    grid = asyncio.ensure_future(page.wait_for_selector(GRID, state="visible", timeout=timeout))
+    empty = asyncio.ensure_future(page.wait_for_selector(
+        f"{LBL_EMPTY}:has-text('No Records Found')", state="attached", timeout=timeout
+    ))
+    pending = {grid, empty}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            failed = [t for t in done if t.exception() is not None]
+            if grid in done and grid not in failed: return "grid"
+            if empty in done and empty not in failed: return "empty"
+        raise grid.exception()
+    finally:
+        for t in pending:
+            t.cancel()
+
+async def wait_grid_visible(page: Page, timeout=10000):
+    await page.wait_for_selector(GRID, state="visible", timeout=timeout)
+
+async def wait_rows_present(page: Page, timeout=14000):
     r"""
     Wait until:
       - grid has >0 rows, OR
@@ -134,7 +160,7 @@ def wait_rows_present(page: Page, timeout=14000):
 
     (Raw docstring so '\d' in the JS regex below doesn't trigger a Python warning.)
     """
-    page.wait_for_function(
+    await page.wait_for_function(
         r"""(gridSel, panelSel, emptySel) => {
             const grid = document.querySelector(gridSel);
             if (!grid) return false;
@@ -161,43 +187,78 @@ def wait_rows_present(page: Page, timeout=14000):
     )
 
 # ---------------- pagination ----------------
-def grid_fingerprint(page: Page) -> str:
-    return page.evaluate(
-        """sel => {
-            const t = document.querySelector(sel);
-            if (!t) return '';
-            const node = t.querySelector('tbody') || t;
-            const txt = (node.innerText || '').trim();
-            return txt.slice(0, 4000);
-        }""",
-        GRID
-    ) or ""
-
-def wait_grid_changed(page: Page, prev: str, timeout=FINGERPRINT_TIMEOUT_MS):
-    page.wait_for_function(
-        """(args) => {
-            const [sel, prev] = args;
-            const t = document.querySelector(sel);
-            if (!t) return false;
-            const node = t.querySelector('tbody') || t;
-            const now = (node.innerText || '').trim();
+# Short, stable summary of the grid body: "<row count>:<hash of its text>", or '' when
+# the grid is missing/empty. Only this string crosses to Python on each poll
+GRID_FINGERPRINT_JS = """sel => {
+    const t = document.querySelector(sel);
+    if (!t) return '';
+    const node = t.querySelector('tbody') || t;
+    const txt = (node.innerText || '').trim();
+    if (!txt) return '';
+    let h = 0;
+    for (let i = 0; i < txt.length; i++) h = (h * 31 + txt.charCodeAt(i)) | 0;
+    return node.querySelectorAll('tr').length + ':' + h;
+}"""
+
+async def grid_fingerprint(page: Page) -> str:
+    return await page.evaluate(GRID_FINGERPRINT_JS, GRID) or ""
+
+async def wait_grid_changed(page: Page, prev: str, timeout=FINGERPRINT_TIMEOUT_MS):
+    await page.wait_for_function(
+        f"""([sel, prev]) => {{
+            const now = ({GRID_FINGERPRINT_JS})(sel);
             return now && now !== prev;
-        }""",
+        }}""",
         arg=[GRID, prev], timeout=timeout
     )
 
+PAGER_SCOPES = (GRID, PANEL, "body")
+# Index into PAGER_SCOPES of the scope the pager was last found in (same markup on every page)
+_last_pager_scope = 0
+
+def _pager_scope_order() -> List[int]:
+    return [_last_pager_scope] + [i for i in range(len(PAGER_SCOPES)) if i != _last_pager_scope]
+
 def _pager_scopes(page: Page):
-    return [page.locator(GRID), page.locator(PANEL), page.locator("body")]
-
-def current_page_number(page: Page) -> Optional[int]:
-    for scope in _pager_scopes(page):
-        span_nums = scope.locator("span").filter(has_text=re.compile(r"^\s*\d+\s*$"))
-        if span_nums.count():
-            try: return int(span_nums.first.inner_text().strip())
-            except Exception: return None
-    return None
+    """(index, locator) per pager scope, the one that matched last time first."""
+    return [(i, page.locator(PAGER_SCOPES[i])) for i in _pager_scope_order()]
+
+def _remember_pager_scope(idx: int):
+    global _last_pager_scope
+    _last_pager_scope = idx
+
+async def pager_state(page: Page) -> Tuple[Optional[int], int]:
+    """
+    (current page, highest page number) in one evaluate.
+    Current page is the first numeric <span> in the first pager scope that has one;
+    the highest is taken over every numeric link/span on the page.
+    """
+    order = _pager_scope_order()
+    state = await page.evaluate(
+        r"""([sels, idxs]) => {
+            const isNum = el => /^\d+$/.test((el.innerText || '').trim());
+            let cur = null, scope = null;
+            for (let k = 0; k < sels.length && cur === null; k++) {
+                const sc = document.querySelector(sels[k]);
+                const span = sc && Array.from(sc.querySelectorAll('span')).find(isNum);
+                if (span) { cur = +span.innerText.trim(); scope = idxs[k]; }
+            }
+            let max = 0;
+            for (const el of document.body.querySelectorAll('a,span')) {
+                if (isNum(el)) max = Math.max(max, +el.innerText.trim());
+            }
+            return {cur, max, scope};
+        }""",
+        [[PAGER_SCOPES[i] for i in order], order]
+    )
+    if state["scope"] is not None:
+        _remember_pager_scope(state["scope"])
+    return state["cur"], state["max"]
+
+async def current_page_number(page: Page) -> Optional[int]:
+    return (await pager_state(page))[0]
 
-def click_next_if_any(page: Page) -> bool:
+async def click_next_if_any(page: Page) -> bool:
     """
     Advance strictly forward:
       - detect current and max page numbers
@@ -206,38 +267,19 @@ def click_next_if_any(page: Page) -> bool:
       - fall back to 'Next' only if numbers can't be read
       - NEVER click '2' blindly (avoids 2<->3 ping-pong)
     """
-    prev = grid_fingerprint(page)
+    prev = await grid_fingerprint(page)
 
-    # Find current page number
-    curr = None
-    for scope in _pager_scopes(page):
-        span = scope.locator("span").filter(has_text=re.compile(r"^\s*\d+\s*$"))
-        if span.count():
-            try:
-                curr = int(span.first.inner_text().strip())
-                break
-            except Exception:
-                pass
-
-    # Compute max page
-    max_page = 0
-    for scope in _pager_scopes(page):
-        for loc in (scope.locator("a"), scope.locator("span")):
-            c = loc.count()
-            for i in range(c):
-                t = (loc.nth(i).inner_text() or "").strip()
-                if t.isdigit():
-                    max_page = max(max_page, int(t))
+    # Current and max page number
+    curr, max_page = await pager_state(page)
 
     # If we can't tell where we are, try 'Next' once
     if curr is None:
-        for scope in _pager_scopes(page):
-            nxt = scope.locator("a").filter(has_text=re.compile(r"^\s*(Next|›|>)\s*$", re.I))
-            if nxt.count():
-                nxt.first.click()
-                sleep(page, WAIT_AFTER_PAGER_MS)
+        for _, scope in _pager_scopes(page):
+            nxt = scope.locator("a").filter(has_text=PAGER_NEXT)
+            if await nxt.count():
+                await nxt.first.click()
                 try:
-                    wait_grid_changed(page, prev)
+                    await wait_grid_changed(page, prev)
                     return True
                 except PWTimeout:
                     return False
@@ -249,211 +291,293 @@ def click_next_if_any(page: Page) -> bool:
 
     # Click (curr + 1) explicitly
     target_text = str(curr + 1)
-    for scope in _pager_scopes(page):
-        tgt = scope.locator("a").filter(has_text=re.compile(rf"^\s*{target_text}\s*$"))
-        if tgt.count():
-            tgt.first.click()
-            sleep(page, WAIT_AFTER_PAGER_MS)
+    for _, scope in _pager_scopes(page):
+        tgt = scope.locator("a").filter(has_text=pager_label(target_text))
+        if await tgt.count():
+            await tgt.first.click()
             try:
-                wait_grid_changed(page, prev)
+                await wait_grid_changed(page, prev)
                 return True
             except PWTimeout:
                 return False
 
     # Last resort: 'Next'
-    for scope in _pager_scopes(page):
-        nxt = scope.locator("a").filter(has_text=re.compile(r"^\s*(Next|›|>)\s*$", re.I))
-        if nxt.count():
-            nxt.first.click()
-            sleep(page, WAIT_AFTER_PAGER_MS)
+    for _, scope in _pager_scopes(page):
+        nxt = scope.locator("a").filter(has_text=PAGER_NEXT)
+        if await nxt.count():
+            await nxt.first.click()
             try:
-                wait_grid_changed(page, prev)
+                await wait_grid_changed(page, prev)
                 return True
             except PWTimeout:
                 return False
 
     return False
 
-def go_to_page_one(page: Page) -> bool:
+async def go_to_page_one(page: Page) -> bool:
     """Ensure pager is on page 1 after Search (GridView PageIndex sometimes sticks)."""
-    prev = grid_fingerprint(page)
-    for scope in _pager_scopes(page):
+    prev = await grid_fingerprint(page)
+    for idx, scope in _pager_scopes(page):
         # already on 1?
-        span1 = scope.locator("span").filter(has_text=re.compile(r"^\s*1\s*$"))
-        if span1.count():
+        span1 = scope.locator("span").filter(has_text=pager_label("1"))
+        if await span1.count():
+            _remember_pager_scope(idx)
             return True
         # otherwise click '1'
-        link1 = scope.locator("a").filter(has_text=re.compile(r"^\s*1\s*$"))
-        if link1.count():
-            link1.first.click()
-            sleep(page, 700)
-            try: wait_grid_changed(page, prev, timeout=15000)
+        link1 = scope.locator("a").filter(has_text=pager_label("1"))
+        if await link1.count():
+            _remember_pager_scope(idx)
+            await link1.first.click()
+            try: await wait_grid_changed(page, prev, timeout=15000)
             except PWTimeout: pass
             return True
     return False  # single-page grid (no pager)
 
-def ensure_grid_ready(page: Page) -> bool:
+async def ensure_grid_ready(page: Page) -> bool:
     """Robust guard after search/paging/closing popup. Soft-refresh if needed."""
     try:
-        wait_grid_visible(page, timeout=4000)
-        wait_rows_present(page, timeout=14000)
+        await wait_grid_visible(page, timeout=4000)
+        await wait_rows_present(page, timeout=14000)
         return True
     except PWTimeout:
         # soft refresh (safe due to per-state de-dupe)
         try:
-            page.click(BTN)
-            sleep(page, WAIT_AFTER_SEARCH_MS)
-            wait_for_results_or_empty(page, timeout=20000)
-            wait_grid_visible(page, timeout=4000)
-            wait_rows_present(page, timeout=14000)
+            await page.click(BTN)
+            await wait_postback_settled(page, timeout=20000)
+            await wait_for_results_or_empty(page, timeout=20000)
+            await wait_grid_visible(page, timeout=4000)
+            await wait_rows_present(page, timeout=14000)
             return True
         except Exception:
             return False
 
 # ---------------- popup handling ----------------
-def try_open_popup(page: Page, lnk) -> Optional[PopupCtx]:
-    """Retries + escalating click strategies; returns Page/Frame that hosts #lblProjectName."""
+async def try_open_popup(page: Page, lnk, prev_name: str) -> Optional[PopupCtx]:
+    """Retries + escalating click strategies; returns Page/Frame that hosts #lblProjectName.
+
+    prev_name is what the in-page label showed before the click, so a modal that is still
+    attached with the previous project's text isn't taken for the new one.
+    """
     for attempt in range(1, MAX_CLICK_RETRIES + 1):
-        try: lnk.wait_for(state="visible", timeout=2000)
+        try: await lnk.wait_for(state="visible", timeout=2000)
         except Exception: pass
 
-        dismiss_overlays(page)
-        sleep(page, WAIT_BEFORE_CLICK_MS)
+        await dismiss_overlays(page)
 
         # 1) new window
         try:
-            with page.expect_popup(timeout=EXPECT_POPUP_TIMEOUT_MS) as pop_info:
-                lnk.click()
-            popup = pop_info.value
-            try: popup.wait_for_selector("#lblProjectName", timeout=MODAL_FIELD_TIMEOUT_MS)
+            async with page.expect_popup(timeout=EXPECT_POPUP_TIMEOUT_MS) as pop_info:
+                await lnk.click()
+            popup = await pop_info.value
+            try: await popup.wait_for_selector("#lblProjectName", timeout=MODAL_FIELD_TIMEOUT_MS)
             except PWTimeout: pass
-            sleep(page, WAIT_AFTER_CLICK_MS)
             return popup
         except PWTimeout: pass
         except Exception: pass
 
         # 2) normal / force / JS click on same page/frame
-        try: lnk.click(timeout=1500)
+        try: await lnk.click(timeout=1500)
         except Exception:
-            try: lnk.click(timeout=1500, force=True)
+            try: await lnk.click(timeout=1500, force=True)
             except Exception:
-                try: lnk.evaluate("el => el.click()")
+                try: await lnk.evaluate("el => el.click()")
                 except Exception:
-                    sleep(page, 250 + attempt * 150); continue
+                    await backoff(page, attempt); continue
+
+        # Modal may render in the page or in an iframe; poll both until it shows up
+        ctx = await find_modal(page, prev_name)
+        if ctx: return ctx
 
-        sleep(page, WAIT_AFTER_CLICK_MS)
+        await backoff(page, attempt)
+    return None
+
+# True once #lblProjectName is visible and shows a project other than `prev`
+MODAL_READY_JS = """prev => {
+    const el = document.querySelector('#lblProjectName');
+    if (!el || el.getClientRects().length === 0) return false;
+    const text = (el.textContent || '').trim();
+    return text.length > 0 && text !== prev;
+}"""
+
+async def modal_project_name(page: Page) -> str:
+    """Current #lblProjectName text in the page or any of its frames ('' if none)."""
+    for fr in page.frames:
+        try:
+            text = await fr.evaluate(
+                "() => (document.querySelector('#lblProjectName')?.textContent || '').trim()"
+            )
+        except Exception:
+            continue
+        if text:
+            return text
+    return ""
 
-        if page.locator("#lblProjectName").count():
-            sleep(page, WAIT_AFTER_MODAL_READY_MS); return page
+async def find_modal(page: Page, prev_name: str) -> Optional[PopupCtx]:
+    """Return the page/frame whose modal shows a new project, or None once POPUP_APPEAR_TIMEOUT_MS passes."""
+    for _ in range(POPUP_APPEAR_TIMEOUT_MS // POPUP_POLL_MS):
         for fr in page.frames:
             try:
-                if fr.locator("#lblProjectName").count():
-                    sleep(page, WAIT_AFTER_MODAL_READY_MS); return fr
+                if await fr.evaluate(MODAL_READY_JS, prev_name):
+                    return page if fr is page.main_frame else fr
             except Exception: pass
-
-        sleep(page, 250 + attempt * 150)
+        await sleep(page, POPUP_POLL_MS)
     return None
 
-def read_popup(ctx: PopupCtx) -> dict:
-    def g(sel: str) -> str:
-        loc = ctx.locator(sel)
-        return tidy(loc.first.text_content()) if loc.count() else ""
-    return {
-        "project_name": g("#lblProjectName"),
-        "builder_name": g("#lblBuilderName"),
-        "city": g("#lblCity"),
-        "state_in_popup": g("#lblState"),
-        "price_min": numtext(g("#lblBudgetMinRange")),
-        "price_max": numtext(g("#lblBudgetMaxRange")),
-        "rera_id": g("#lblRERAID"),
-        "uco_property_id": g("#lblPropertyID"),
-        "possession_in": g("#lblPosessionIn"),
-        "bhk": g("#lblTypeOfAvailableUnits"),
-        "plot_size": numtext(g("#lblTotalUnits")),
-        "towers": numtext(g("#lblAvailableUnits")),
-        "amenities": g("#lblAmenities").replace("\n", " "),
-        "bua_min_sqft": numtext(g("#lblBuildUpAreaMinRange")),
-        "bua_max_sqft": numtext(g("#lblBuildUpAreaMaxRange")),
-        "carpet_min_sqft": numtext(g("#lblCarpetAreaMinRange")),
-        "carpet_max_sqft": numtext(g("#lblCarpetAreaMaxRange")),
-        "carpet_price": numtext(g("#lblAverageRate")),
-        "apartments_per_floor": numtext(g("#lblAppartmentPerFloor")),
-        "branch_head": g("#lblBranchHead"),
-        "branch_email": tidy(g("#lblBranchEmail").replace("[at]", "@").replace("[dot]", ".")),
-        "contact_no": numtext(g("#lblContactNo")),
-        "email": tidy(g("#lblEmailID").replace("[at]", "@").replace("[dot]", ".")),
-        "website": g("#lblWebsite"),
-    }
-
-def try_close_popup(ctx: PopupCtx, page: Page):
+# Popup field -> label element holding it
+POPUP_FIELDS = {
+    "project_name": "#lblProjectName",
+    "builder_name": "#lblBuilderName",
+    "city": "#lblCity",
+    "state_in_popup": "#lblState",
+    "price_min": "#lblBudgetMinRange",
+    "price_max": "#lblBudgetMaxRange",
+    "rera_id": "#lblRERAID",
+    "uco_property_id": "#lblPropertyID",
+    "possession_in": "#lblPosessionIn",
+    "bhk": "#lblTypeOfAvailableUnits",
+    "plot_size": "#lblTotalUnits",
+    "towers": "#lblAvailableUnits",
+    "amenities": "#lblAmenities",
+    "bua_min_sqft": "#lblBuildUpAreaMinRange",
+    "bua_max_sqft": "#lblBuildUpAreaMaxRange",
+    "carpet_min_sqft": "#lblCarpetAreaMinRange",
+    "carpet_max_sqft": "#lblCarpetAreaMaxRange",
+    "carpet_price": "#lblAverageRate",
+    "apartments_per_floor": "#lblAppartmentPerFloor",
+    "branch_head": "#lblBranchHead",
+    "branch_email": "#lblBranchEmail",
+    "contact_no": "#lblContactNo",
+    "email": "#lblEmailID",
+    "website": "#lblWebsite",
+}
+POPUP_NUMERIC_FIELDS = {
+    "price_min", "price_max", "plot_size", "towers",
+    "bua_min_sqft", "bua_max_sqft", "carpet_min_sqft", "carpet_max_sqft",
+    "carpet_price", "apartments_per_floor", "contact_no",
+}
+POPUP_EMAIL_FIELDS = {"branch_email", "email"}
+
+async def read_popup(ctx: PopupCtx) -> dict:
+    # All labels in one evaluate (one driver round-trip instead of two per field)
+    raw = await ctx.evaluate(
+        """sels => Object.fromEntries(Object.entries(sels).map(
+            ([k, s]) => [k, document.querySelector(s)?.textContent || '']
+        ))""",
+        POPUP_FIELDS
+    )
+    rec = {}
+    for key, text in raw.items():
+        text = tidy(text)
+        if key in POPUP_NUMERIC_FIELDS:
+            text = numtext(text)
+        elif key in POPUP_EMAIL_FIELDS:
+            text = tidy(text.replace("[at]", "@").replace("[dot]", "."))
+        rec[key] = text
+    return rec
+
+async def try_close_popup(ctx: PopupCtx, page: Page):
     if isinstance(ctx, Page) and ctx is not page:
-        try: ctx.close(); return
+        try: await ctx.close(); return
         except Exception: pass
+    # An in-page modal stays attached after closing; blank its labels so the next
+    # popup can't be read before its own data has arrived
+    try:
+        await ctx.evaluate(
+            "sels => Object.values(sels).forEach(s => { const el = document.querySelector(s); if (el) el.textContent = ''; })",
+            POPUP_FIELDS
+        )
+    except Exception:
+        pass
     try:
-        page.keyboard.press("Escape")
-        sleep(page, 120)
+        await page.keyboard.press("Escape")
     except Exception:
         pass
-    dismiss_overlays(page)
-    wait_grid_visible(page, timeout=4000)
+    await dismiss_overlays(page)
+    await wait_grid_visible(page, timeout=4000)
 
 # ---------------- per-page ----------------
-def process_current_page(page: Page, state_label: str, writer, write_if_new):
+async def process_current_page(page: Page, state_label: str, writer, write_if_new, known_projects: Set[str]):
     processed_keys: Set[Tuple[int, str, str]] = set()  # (row_index, text, href)
     while True:
-        if not ensure_grid_ready(page):
+        if not await ensure_grid_ready(page):
             print("    [!] Grid not ready; skipping remainder of this page")
             return
 
-        rows = page.locator(f"{GRID} tbody tr")
-        if rows.count() == 0: rows = page.locator(f"{GRID} tr")
+        # Scan every row in one evaluate; only the anchors we click get a locator
+        scan = await page.evaluate(
+            """sel => {
+                const grid = document.querySelector(sel);
+                if (!grid) return {tbody: true, rows: 0, anchors: []};
+                let rows = grid.querySelectorAll('tbody tr');
+                const tbody = rows.length > 0;
+                if (!tbody) rows = grid.querySelectorAll('tr');
+                const header = new Set(['s.no', 's no', 'serial', 'sr.', 'srl']);
+                const anchors = [];
+                rows.forEach((tr, i) => {
+                    // Header rows are <th> rows; the text check covers grids that render them as <td>
+                    if (tr.querySelector('th')) return;
+                    const td = tr.querySelector('td');
+                    if (!td) return;
+                    const first = (td.innerText || '').replace(/\s+/g, ' ').trim().toLowerCase();
+                    if (header.has(first)) return;
+                    const a = tr.querySelector('td:nth-child(2) a');
+                    if (!a) return;
+                    anchors.push({i, text: a.innerText || '', href: a.getAttribute('href') || ''});
+                });
+                return {tbody, rows: rows.length, anchors};
+            }""",
+            GRID
+        )
+        rows = page.locator(f"{GRID} tbody tr" if scan["tbody"] else f"{GRID} tr")
 
         anchors = []
-        for i in range(rows.count()):
-            row = rows.nth(i)
-            tds = row.locator("td")
-            if tds.count() == 0: continue
-            first_cell = tidy(tds.first.inner_text())
-            if first_cell.lower() in {"s.no", "s no", "serial", "sr.", "srl"}:
-                continue
-            a = row.locator("td:nth-child(2) a").first
-            if not a.count(): continue
-            txt  = tidy(a.inner_text())
+        for meta in scan["anchors"]:
+            txt = tidy(meta["text"])
             if not txt: continue
-            href = a.get_attribute("href") or ""
-            key  = (i, txt.lower(), href)
+            i = meta["i"]
+            a = rows.nth(i).locator("td:nth-child(2) a").first
+            key = (i, txt.lower(), meta["href"])
             anchors.append((i, a, key, txt))
 
-        page_num = current_page_number(page)
-        print(f"    [-] Page {page_num or '?'}: rows={rows.count()} clickable={len(anchors)}")
+        page_num = await current_page_number(page)
+        print(f"    [-] {state_label} page {page_num or '?'}: rows={scan['rows']} clickable={len(anchors)}")
 
         clicked_any = False
         for i, a, key, txt in anchors:
             if key in processed_keys: continue
+            # Already in the CSV from an earlier run: don't open the popup at all
+            if txt.lower() in known_projects:
+                processed_keys.add(key)
+                continue
 
-            ctx = try_open_popup(page, a)
+            prev_name = await modal_project_name(page)
+            ctx = await try_open_popup(page, a, prev_name)
             if not ctx:
                 processed_keys.add(key)
                 continue
 
+            # A popup window starts fresh; an in-page modal must move off the previous project
+            fresh_window = isinstance(ctx, Page) and ctx is not page
             try:
-                ctx.wait_for_function(
-                    "() => (document.querySelector('#lblProjectName')?.textContent || '').trim().length > 0",
+                await ctx.wait_for_function(
+                    MODAL_READY_JS, arg="" if fresh_window else prev_name,
                     timeout=MODAL_FIELD_TIMEOUT_MS
                 )
             except PWTimeout:
-                pass
-            sleep(page, WAIT_AFTER_MODAL_READY_MS)
+                print(f"      [!] Popup for {txt} never showed its project; skipping")
+                processed_keys.add(key)
+                await try_close_popup(ctx, page)
+                continue
 
-            rec = read_popup(ctx)
+            rec = await read_popup(ctx)
             rec["state"] = state_label
             if write_if_new(rec):
                 print(f"      [+] {rec['project_name']} - {rec['builder_name']}")
                 clicked_any = True
 
             processed_keys.add(key)
-            try_close_popup(ctx, page)
-            if not ensure_grid_ready(page):
+            await try_close_popup(ctx, page)
+            if not await ensure_grid_ready(page):
                 print("    [!] Grid not ready after closing popup; stopping this page")
                 return
 
@@ -461,193 +585,269 @@ def process_current_page(page: Page, state_label: str, writer, write_if_new):
             break  # page is exhausted
 
 # ---------------- per-state ----------------
-def process_state(page: Page, state_label: str, state_value: str, writer):
+async def process_state(page: Page, state_label: str, state_value: str, writer, seen: Set[Tuple[str, str, str]]):
     print(f"[>] State: {state_label}")
-    
+
     # Ensure dropdown is ready and visible before selecting
     try:
-        page.wait_for_selector(DDL, state="visible", timeout=15000)
-        # Wait a bit more for dropdown to be fully interactive
-        sleep(page, 300)
+        await page.wait_for_selector(DDL, state="visible", timeout=15000)
     except PWTimeout:
         print(f"    [!] Dropdown not found for {state_label}, trying to reload page...")
         # Reload page if dropdown is not available
         try:
-            page.goto(BASE, wait_until="domcontentloaded", timeout=40000)
-            page.wait_for_selector(DDL, state="visible", timeout=15000)
-            sleep(page, 500)
+            await page.goto(BASE, wait_until="domcontentloaded", timeout=40000)
+            await page.wait_for_selector(DDL, state="visible", timeout=15000)
         except PWTimeout:
             print(f"    [!] Failed to reload page or find dropdown for {state_label}, skipping")
             return
-    
+
     try:
-        page.select_option(DDL, value=state_value, timeout=20000)
-    except PWTimeout:
-        print(f"    [!] Timeout selecting option for {state_label}, skipping state")
-        return
+        # Set the value without firing 'change': if the dropdown auto-posts back, that is
+        # a whole extra postback before Search, which posts the selected value anyway
+        selected = await page.evaluate(
+            """([sel, val]) => {
+                const d = document.querySelector(sel);
+                if (!d || !Array.from(d.options).some(o => o.value === val)) return false;
+                d.value = val;
+                return true;
+            }""",
+            [DDL, state_value]
+        )
+        if not selected:
+            print(f"    [!] Option for {state_label} not in dropdown, skipping state")
+            return
     except Exception as e:
         print(f"    [!] Error selecting option for {state_label}: {e}, skipping state")
         return
-    
-    dismiss_overlays(page)
-    print("    [-] clicking Search...")
-    page.click(BTN)
 
-    print("    [-] waiting for results or empty...")
+    await dismiss_overlays(page)
+    await page.click(BTN)
+
     try:
-        status = wait_for_results_or_empty(page, timeout=25000)
+        await wait_postback_settled(page, timeout=25000)
+        status = await wait_for_results_or_empty(page, timeout=25000)
     except PWTimeout:
-        print("    [!] Timeout waiting results"); return
+        print(f"    [!] {state_label}: Timeout waiting results"); return
     if status == "empty":
-        print("    [-] No Records Found"); return
-    if status != "grid":
-        print("    [-] Unknown result state; skipping"); return
-
-    sleep(page, WAIT_AFTER_SEARCH_MS)
+        print(f"    [-] {state_label}: No Records Found"); return
 
     # Always reset pager to Page 1 for each new state
-    if go_to_page_one(page):
-        print("    [-] Pager set to Page 1")
+    if await go_to_page_one(page):
+        print(f"    [-] {state_label}: Pager set to Page 1")
     else:
-        print("    [-] Single-page result (no pager)")
+        print(f"    [-] {state_label}: Single-page result (no pager)")
 
-    print("    [-] waiting for grid rows to appear...")
-    if not ensure_grid_ready(page):
-        print("    [!] Grid not ready after search; skipping state")
+    if not await ensure_grid_ready(page):
+        print(f"    [!] {state_label}: Grid not ready after search; skipping state")
         return
-    print("    [OK] grid ready")
+    print(f"    [OK] {state_label}: grid ready")
 
-    # per-state de-dupe
-    written_keys: Set[Tuple[str, str]] = set()
+    # De-dupe against this run and everything already in the CSV. The grid only shows
+    # the project name, so that is what decides whether a popup is worth opening
+    state_key = state_label.lower()
+    known_projects = {proj for st, proj, _ in seen if st == state_key}
     def write_if_new(rec: dict) -> bool:
         key = (
+            state_key,
             rec.get("project_name", "").lower(),
             rec.get("builder_name", "").lower(),
         )
-        if rec.get("project_name") and rec.get("builder_name") and key not in written_keys:
+        if rec.get("project_name") and rec.get("builder_name") and key not in seen:
             row = {k: rec.get(k, "") for k in FIELDNAMES}
+            # No await in here, so rows from concurrent states never interleave
             writer.writerow(row)
-            written_keys.add(key)
+            seen.add(key)
             return True
         return False
 
     while True:
-        process_current_page(page, state_label, writer, write_if_new)
-        prev = grid_fingerprint(page)
-        if not click_next_if_any(page):
+        await process_current_page(page, state_label, writer, write_if_new, known_projects)
+        prev = await grid_fingerprint(page)
+        if not await click_next_if_any(page):
             break
-        sleep(page, WAIT_AFTER_PAGER_MS)
-        if not ensure_grid_ready(page):
-            print("    [!] Grid not ready after paging; stopping this state")
+        if not await ensure_grid_ready(page):
+            print(f"    [!] {state_label}: Grid not ready after paging; stopping this state")
             break
         try:
-            wait_grid_changed(page, prev)
+            await wait_grid_changed(page, prev)
         except PWTimeout:
             break
 
-# ---------------- main ----------------
-def main():
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=True, args=["--disable-blink-features=AutomationControlled"]) 
-        context = browser.new_context(
-            viewport={"width": 1366, "height": 800},
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
-            ),
-            locale="en-US",
-            device_scale_factor=1,
-            has_touch=False,
-            is_mobile=False,
-        )
-        context.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', { get: () => undefined });"
+# ---------------- browser ----------------
+# Never needed for scraping. Stylesheets stay: visibility checks and the modal depend on them
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+async def block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def new_scraper_page(browser: Browser) -> Page:
+    """Open a page in a fresh context (own cookies and ASP.NET session)."""
+    context = await browser.new_context(
+        viewport={"width": 1366, "height": 800},
+        user_agent=(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
+        ),
+        locale="en-US",
+        device_scale_factor=1,
+        has_touch=False,
+        is_mobile=False,
+    )
+    await context.add_init_script(
+        "Object.defineProperty(navigator, 'webdriver', { get: () => undefined });"
+    )
+    await context.route("**/*", block_heavy_resources)
+    page = await context.new_page()
+    page.set_default_timeout(30000)
+    return page
+
+async def open_base(page: Page):
+    # The form is in the initial HTML; waiting for network silence only adds seconds.
+    # Several pages load at once, so one failed load mustn't end the run: process_state
+    # reloads a page whose dropdown isn't there
+    try:
+        await page.goto(BASE, wait_until="domcontentloaded", timeout=60_000)
+    except PWError as e:  # timeouts and network errors alike
+        print(f"    [!] Could not load {BASE}: {e}")
+        return
+
+    # Dismiss any overlays or consent dialogs that might block the dropdown
+    await dismiss_overlays(page)
+
+    # Try to accept any consent dialogs
+    try:
+        consent_selectors = [
+            "button#onetrust-accept-btn-handler",
+            "button[aria-label*='Accept']",
+            "button:has-text('Accept')",
+            "button:has-text('I Agree')",
+            ".cookie-accept",
+            "#accept-cookies"
+        ]
+        for sel in consent_selectors:
+            btn = page.locator(sel).first
+            if await btn.count() > 0 and await btn.is_visible():
+                await btn.click()
+                break
+    except Exception as e:
+        print(f"    [!] Could not check for a consent dialog: {e}")
+
+    try:
+        await page.wait_for_selector(DDL, state="visible", timeout=30000)
+        await page.wait_for_function(
+            "sel => (document.querySelector(sel)?.options.length || 0) > 1",
+            arg=DDL, timeout=30000
         )
-        page = context.new_page()
-        page.set_default_timeout(30000)
-        
-        print("[DEBUG] Navigating to base URL...")
-        page.goto(BASE, wait_until="networkidle", timeout=120_000)
-        print("[DEBUG] Page loaded, dismissing overlays...")
-        
-        # Dismiss any overlays or consent dialogs that might block the dropdown
-        dismiss_overlays(page)
-        sleep(page, 1000)
-        
-        # Try to accept any consent dialogs
+    except PWTimeout:
+        print("    [!] Dropdown not ready yet after load")  # process_state reloads if needed
+
+def load_seen_keys() -> Set[Tuple[str, str, str]]:
+    """(state, project, builder) of every row already in the CSV, lowercased."""
+    if not CSV_PATH.exists():
+        return set()
+    with CSV_PATH.open(newline="", encoding="utf-8") as f:
+        return {
+            (r["state"].lower(), r["project_name"].lower(), r["builder_name"].lower())
+            for r in csv.DictReader(f)
+            if r.get("state") and r.get("project_name") and r.get("builder_name")
+        }
+
+async def state_worker(page: Page, queue: asyncio.Queue, writer, csv_file, seen: Set[Tuple[str, str, str]]):
+    """Take states off the queue one at a time and scrape them on this worker's page."""
+    while True:
+        try:
+            state_label, state_value = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
         try:
-            consent_selectors = [
-                "button#onetrust-accept-btn-handler",
-                "button[aria-label*='Accept']",
-                "button:has-text('Accept')",
-                "button:has-text('I Agree')",
-                ".cookie-accept",
-                "#accept-cookies"
-            ]
-            for sel in consent_selectors:
-                btn = page.locator(sel).first
-                if btn.count() > 0 and btn.is_visible():
-                    print(f"    [DEBUG] Found consent button: {sel}, clicking...")
-                    btn.click()
-                    sleep(page, 500)
-                    break
+            await process_state(page, state_label, state_value, writer, seen)
         except Exception as e:
-            print(f"    [DEBUG] No consent dialog found or error: {e}")
-        
-        print("[DEBUG] Waiting for dropdown...")
-        # Wait extra time for page to fully initialize
-        sleep(page, 2000)
-        
-        options = get_state_options(page)
+            print(f"    [!] {state_label}: failed with {e!r}, moving on")
+        # Flush after each state so finished states are on disk
+        csv_file.flush()
+
+async def scrape_all_states():
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True, args=["--disable-blink-features=AutomationControlled"])
+        options = load_cached_states()
+        if options:
+            # No need to read the dropdown first, so every worker page can load at once
+            print(f"[+] Using state list cached in {STATES_CACHE_PATH}")
+            pages = []
+        else:
+            first_page = await new_scraper_page(browser)
+            await open_base(first_page)
+            options = await get_state_options(first_page)
+            if options:
+                STATES_CACHE_PATH.write_text(json.dumps(options), encoding="utf-8")
+            pages = [first_page]
         print(f"[+] States found: {len(options)}")
         print(f"[+] States: {[l for l,_ in options]}")
 
-        # Ensure CSV header exists once
-        if not CSV_PATH.exists() or CSV_PATH.stat().st_size == 0:
-            with CSV_PATH.open("w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        # One browser, several contexts: each worker page runs its own search/pager
+        # session, so states are scraped side by side
+        workers = max(1, min(STATE_WORKERS, len(options)))
+        new_pages = [await new_scraper_page(browser) for _ in range(workers - len(pages))]
+        await asyncio.gather(*(open_base(p) for p in new_pages))
+        pages += new_pages
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for option in options:
+            queue.put_nowait(option)
+
+        seen = load_seen_keys()
+        print(f"[+] Rows already in CSV: {len(seen)}")
+
+        # Append rows as each state completes; one handle (1 MB buffer, flushed per
+        # state) shared by all workers so concurrent states never interleave partial lines
+        with CSV_PATH.open("a", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            # Header only for a new/empty file
+            if f.tell() == 0:
                 writer.writeheader()
-
-        # Append rows state-by-state (so data is saved as each state completes)
-        for state_label, state_value in options:
-            with CSV_PATH.open("a", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-                process_state(page, state_label, state_value, writer)
+            await asyncio.gather(*(state_worker(p, queue, writer, f, seen) for p in pages))
 
         print(f"[OK] Done. CSV appended at: {CSV_PATH}")
-        browser.close()
-        # After scraping, process CSV and upload to S3
-        try:
-            load_dotenv()
-            bucket = os.getenv('S3_BUCKET_NAME')
-            key_prefix = os.getenv('S3_KEY')
-            if not bucket:
-                raise ValueError("S3_BUCKET_NAME is not set. Please set it in environment or .env")
-            if not key_prefix:
-                raise ValueError("S3_KEY is not set. Please set it in environment or .env")
-
-            import pandas as pd
-            cols = ["state","project_name","builder_name"]
-            df = pd.read_csv(CSV_PATH, names=cols, header=0)
-            grouped = {}
-            for _, r in df.iterrows():
-                grouped.setdefault(r.get("state","Unknown"), []).append({
-                    "builderName": r.get("builder_name","Unknown"),
-                    "projectName": r.get("project_name","Unknown")
+        await browser.close()
+
+# ---------------- main ----------------
+def main():
+    asyncio.run(scrape_all_states())
+
+    # After scraping, process CSV and upload to S3
+    try:
+        load_dotenv()
+        bucket = os.getenv('S3_BUCKET_NAME')
+        key_prefix = os.getenv('S3_KEY')
+        if not bucket:
+            raise ValueError("S3_BUCKET_NAME is not set. Please set it in environment or .env")
+        if not key_prefix:
+            raise ValueError("S3_KEY is not set. Please set it in environment or .env")
+
+        # Group straight off the CSV (no DataFrame); empty cells fall back to "Unknown"
+        grouped = {}
+        with CSV_PATH.open(newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                grouped.setdefault(r.get("state") or "Unknown", []).append({
+                    "builderName": r.get("builder_name") or "Unknown",
+                    "projectName": r.get("project_name") or "Unknown"
                 })
 
-            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-            s3_key = f"{key_prefix.rstrip('/')}/ucorealty_bank_data_{timestamp}.json"
-            s3 = boto3.client("s3")
-            s3.put_object(
-                Bucket=bucket,
-                Key=s3_key,
-                Body=json.dumps(grouped, indent=4).encode("utf-8"),
-                ContentType="application/json"
-            )
-            print(f"Data uploaded to S3: {s3_key}")
-        except Exception as e:
-            print(f"Error: {str(e)}")
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        s3_key = f"{key_prefix.rstrip('/')}/ucorealty_bank_data_{timestamp}.json"
+        s3 = boto3.client("s3")
+        s3.upload_fileobj(
+            io.BytesIO(json.dumps(grouped, separators=(",", ":")).encode("utf-8")),
+            bucket,
+            s3_key,
+            ExtraArgs={"ContentType": "application/json"},
+        )
+        print(f"Data uploaded to S3: {s3_key}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
 
 if __name__ == "__main__":
     main()